@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Limite de taxa por cliente: cada chave recebe `rate` fichas por segundo até `burst`.
+    consumir() retorna 0 se a requisição pode seguir ou os segundos até a próxima ficha.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def consumir(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                if len(self._buckets) > self.max_keys:
+                    self._evict(now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+    def _evict(self, now):
+        # Remove clientes cujo balde já estaria cheio (inativos)
+        cheio = self.burst / self.rate
+        for key in [k for k, (_, last) in self._buckets.items() if now - last >= cheio]:
+            del self._buckets[key]
+
+
+class ConcurrencyLimiter:
+    """
+    Limite de requisições simultâneas de uma classe de rota, com fila de espera limitada.
+    Quando a fila está cheia (ou a espera estoura) a requisição é recusada imediatamente.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout=1.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        # Esperas de acquire_async(): (loop, future) acordadas por release()
+        self._async_waiters = []
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def acquire(self):
+        with self._cond:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            try:
+                ok = self._cond.wait_for(lambda: self.active < self.max_concurrent, self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not ok:
+                self.timeouts += 1
+                return False
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    async def acquire_async(self):
+        # Mesma política de acquire() para o event loop (asgi.py): a espera não bloqueia o loop
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+        deadline = loop.time() + self.queue_timeout
+        try:
+            while True:
+                with self._cond:
+                    if self.active < self.max_concurrent:
+                        self.active += 1
+                        self.admitted += 1
+                        return True
+                    restante = deadline - loop.time()
+                    if restante <= 0:
+                        self.timeouts += 1
+                        return False
+                    waiter = (loop, loop.create_future())
+                    self._async_waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter[1], restante)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        if waiter in self._async_waiters:
+                            self._async_waiters.remove(waiter)
+        finally:
+            with self._cond:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+            # Acorda todas as esperas assíncronas: a que chegar primeiro ocupa a vaga
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_acordar, future)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+def _acordar(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def parse_limites(texto, padrao):
+    # "leitura=32:64,varredura=4:8" -> {"leitura": (32, 64), "varredura": (4, 8)}
+    limites = dict(padrao)
+    for item in filter(None, (texto or "").split(",")):
+        nome, valores = item.split("=")
+        concorrentes, fila = valores.split(":")
+        limites[nome.strip()] = (int(concorrentes), int(fila))
+    return limites
@@ -0,0 +1,92 @@
+# Contagens de Tarefas mantidas por gatilhos (migração 8), lidas por GET /tarefas/estatisticas:
+#   Tarefas_contagem(dimensao, valor, total)   uma linha por status, usuário e prioridade
+#   Tarefas_prazo_status(prazo, fk_status, total)   base das tarefas atrasadas (prazo < hoje)
+# Valores NULL são gravados como 0 (os IDs começam em 1); prazos que não são datas, como ''.
+# Cada escrita em Tarefas ajusta só as linhas dos grupos afetados.
+
+DIMENSOES = {"status": "fk_status", "usuario": "fk_usuario", "prioridade": "fk_prioridade"}
+PRAZO = "IFNULL(date({ref}.Prazo_de_conclusao), '')"
+
+TABELAS = [
+    """CREATE TABLE IF NOT EXISTS Tarefas_contagem (
+           dimensao TEXT NOT NULL,
+           valor INTEGER NOT NULL,
+           total INTEGER NOT NULL,
+           PRIMARY KEY (dimensao, valor)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS Tarefas_prazo_status (
+           prazo TEXT NOT NULL,
+           fk_status INTEGER NOT NULL,
+           total INTEGER NOT NULL,
+           PRIMARY KEY (prazo, fk_status)
+       ) WITHOUT ROWID""",
+]
+
+
+def _somar(dimensao, coluna, ref, delta):
+    return (f"INSERT INTO Tarefas_contagem (dimensao, valor, total) "
+            f"VALUES ('{dimensao}', IFNULL({ref}.{coluna}, 0), {delta}) "
+            f"ON CONFLICT (dimensao, valor) DO UPDATE SET total = total + {delta};")
+
+
+def _somar_prazo(ref, delta):
+    return (f"INSERT INTO Tarefas_prazo_status (prazo, fk_status, total) "
+            f"VALUES ({PRAZO.format(ref=ref)}, IFNULL({ref}.fk_status, 0), {delta}) "
+            f"ON CONFLICT (prazo, fk_status) DO UPDATE SET total = total + {delta};")
+
+
+def gatilhos():
+    inserir = [_somar(d, c, "NEW", 1) for d, c in DIMENSOES.items()] + [_somar_prazo("NEW", 1)]
+    remover = [_somar(d, c, "OLD", -1) for d, c in DIMENSOES.items()] + [_somar_prazo("OLD", -1)]
+    comandos = [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contagem_insert AFTER INSERT ON Tarefas
+            BEGIN {' '.join(inserir)} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contagem_delete AFTER DELETE ON Tarefas
+            BEGIN {' '.join(remover)} END""",
+    ]
+    # Um gatilho por coluna: mover um card de status só toca as linhas de status e de prazo
+    for dimensao, coluna in DIMENSOES.items():
+        comandos.append(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_contagem_{dimensao}_update AFTER UPDATE OF {coluna} ON Tarefas
+                WHEN OLD.{coluna} IS NOT NEW.{coluna}
+                BEGIN {_somar(dimensao, coluna, "OLD", -1)} {_somar(dimensao, coluna, "NEW", 1)} END""")
+    comandos.append(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contagem_prazo_update AFTER UPDATE OF Prazo_de_conclusao, fk_status ON Tarefas
+            WHEN {PRAZO.format(ref="OLD")} IS NOT {PRAZO.format(ref="NEW")} OR OLD.fk_status IS NOT NEW.fk_status
+            BEGIN {_somar_prazo("OLD", -1)} {_somar_prazo("NEW", 1)} END""")
+    return comandos
+
+
+# Contagens esperadas, calculadas direto de Tarefas: (tabela, chave, consulta)
+CONSULTAS_ESPERADAS = [
+    *[("Tarefas_contagem", ("dimensao", "valor"),
+       f"SELECT '{d}', IFNULL({c}, 0), COUNT(*) FROM Tarefas GROUP BY 2") for d, c in DIMENSOES.items()],
+    ("Tarefas_prazo_status", ("prazo", "fk_status"),
+     f"SELECT {PRAZO.format(ref='Tarefas')}, IFNULL(fk_status, 0), COUNT(*) FROM Tarefas GROUP BY 1, 2"),
+]
+
+
+def reconstruir(conn):
+    # Recalcula as contagens a partir de Tarefas (migração e comando reconstruir-contagens)
+    for tabela in ("Tarefas_contagem", "Tarefas_prazo_status"):
+        conn.execute(f"DELETE FROM {tabela}")
+    for tabela, chave, consulta in CONSULTAS_ESPERADAS:
+        conn.execute(f"INSERT INTO {tabela} ({', '.join(chave)}, total) {consulta}")
+
+
+def divergencias(conn):
+    # Grupos em que a contagem mantida difere da calculada: [(tabela, chave, mantida, esperada)]
+    encontradas = []
+    for tabela in ("Tarefas_contagem", "Tarefas_prazo_status"):
+        consultas = [(chave, consulta) for t, chave, consulta in CONSULTAS_ESPERADAS if t == tabela]
+        chave = consultas[0][0]
+        esperadas = {}
+        for _, consulta in consultas:
+            for *grupo, total in conn.execute(consulta).fetchall():
+                esperadas[tuple(grupo)] = total
+        mantidas = {tuple(grupo): total for *grupo, total in
+                    conn.execute(f"SELECT {', '.join(chave)}, total FROM {tabela}").fetchall()}
+        for grupo in sorted(set(esperadas) | set(mantidas), key=repr):
+            if esperadas.get(grupo, 0) != mantidas.get(grupo, 0):
+                encontradas.append((tabela, grupo, mantidas.get(grupo, 0), esperadas.get(grupo, 0)))
+    return encontradas
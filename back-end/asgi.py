@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs
+
+import httpx
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+# Modo assíncrono (SERVE_MODE=async no serve.py): rotas de I/O externo rodam no event loop
+# com cliente HTTP assíncrono e concorrência limitada; as demais rotas (SQLite) continuam
+# no Flask, executadas em um pool dedicado de DB_THREADS threads.
+DB_THREADS = int(os.environ.get("DB_THREADS", 8))
+UPSTREAM_CONCURRENCY = int(os.environ.get("UPSTREAM_CONCURRENCY", 8))
+
+# Uma conexão do pool por thread do executor; definido antes de importar a aplicação
+os.environ.setdefault("DB_POOL_SIZE", str(DB_THREADS))
+# As conexões do feed de eventos não ocupam threads neste modo
+os.environ.setdefault("EVENTOS_MAX_CONEXOES", "1000")
+# /clima espera no event loop: a classe externa admite tantas chamadas quanto o cliente HTTP
+os.environ.setdefault("ADMISSAO_LIMITES", f"externa={UPSTREAM_CONCURRENCY}:{4 * UPSTREAM_CONCURRENCY}")
+
+from back_end import (  # noqa: E402
+    AUTH_OBRIGATORIA, CORS_ORIGINS, EVENTOS_DURACAO_MAX, EVENTOS_HEARTBEAT, EVENTOS_RETRY_MS,
+    app, broadcaster, clima_client, event_log, limitadores, rate_limiter, token_signer, warm_up,
+)
+from auth import TokenInvalido  # noqa: E402
+from clima_client import CircuitOpen  # noqa: E402
+from events import TooManySubscribers, format_sse  # noqa: E402
+
+
+class KanbanASGI:
+    def __init__(self, wsgi_app, db_threads=DB_THREADS, upstream_concurrency=UPSTREAM_CONCURRENCY):
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=db_threads)
+        self.upstream_concurrency = upstream_concurrency
+        self.http = None
+        self.semaphore = None
+        # Rotas atendidas diretamente no event loop
+        self.routes = {("GET", "/clima"): self.clima, ("GET", "/tarefas/eventos"): self.eventos}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        handler = None
+        if scope["type"] == "http":
+            handler = self.routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+        if self.http is None:
+            await self.startup()
+        await handler(scope, receive, send)
+
+    async def startup(self):
+        self.http = httpx.AsyncClient(
+            timeout=clima_client.timeout,
+            limits=httpx.Limits(max_connections=self.upstream_concurrency),
+        )
+        self.semaphore = asyncio.Semaphore(self.upstream_concurrency)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.startup()
+                # Abre as conexões do pool e carrega os caches nas threads do executor
+                await asyncio.get_running_loop().run_in_executor(self.wsgi.executor, warm_up)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.http is not None:
+                    await self.http.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def cors_headers(self, scope):
+        # Mesmas origens liberadas pelo Flask-CORS
+        origin = dict(scope["headers"]).get(b"origin", b"").decode()
+        if origin not in CORS_ORIGINS:
+            return []
+        return [
+            (b"access-control-allow-origin", origin.encode()),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+    async def send_json(self, scope, send, status, body, headers=()):
+        payload = json.dumps(body, separators=(",", ":")).encode()
+        response_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ]
+        response_headers += [(k.encode(), v.encode()) for k, v in headers]
+        response_headers += self.cors_headers(scope)
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    def autenticar(self, scope, token_na_query=False):
+        # Mesma regra do autenticar() do Flask: devolve (payload do token ou None, erro ou None)
+        auth = dict(scope["headers"]).get(b"authorization", b"").decode()
+        token = auth[7:].strip() if auth.startswith("Bearer ") else None
+        if token is None and token_na_query:
+            # O EventSource do navegador não envia cabeçalhos: o token vem na query string
+            token = parse_qs(scope["query_string"].decode()).get("access_token", [None])[0]
+        if token:
+            try:
+                return token_signer.verificar(token), None
+            except TokenInvalido as e:
+                return None, str(e)
+        if AUTH_OBRIGATORIA:
+            return None, "Token de acesso obrigatório"
+        return None, None
+
+    async def eventos(self, scope, receive, send):
+        # Mesmo feed de GET /tarefas/eventos do Flask, sem prender uma thread do executor por conexão
+        query = parse_qs(scope["query_string"].decode())
+        headers = dict(scope["headers"])
+        _, erro = self.autenticar(scope, token_na_query=True)
+        if erro:
+            await self.send_json(scope, send, 401, {"error": erro})
+            return
+        valor = headers.get(b"last-event-id", b"").decode() or query.get("last_event_id", [""])[0]
+        try:
+            last_event_id = int(valor) if valor else None
+        except ValueError:
+            await self.send_json(scope, send, 400, {"error": "Parâmetro Last-Event-ID deve ser inteiro"})
+            return
+
+        loop = asyncio.get_running_loop()
+        if event_log is not None:
+            await loop.run_in_executor(self.wsgi.executor, event_log.start)
+        try:
+            assinatura = broadcaster.subscribe(last_event_id)
+        except TooManySubscribers:
+            await self.send_json(scope, send, 503, {"error": "Limite de conexões do feed de eventos atingido"},
+                                 [("retry-after", str(EVENTOS_RETRY_MS // 1000))])
+            return
+        acordar = asyncio.Event()
+        assinatura.waker = lambda: loop.call_soon_threadsafe(acordar.set)
+        # O uvicorn descarta em silêncio o que é enviado após a desconexão: ela é detectada pelo receive
+        desconexao = asyncio.ensure_future(self.aguardar_desconexao(receive))
+
+        async def enviar(texto):
+            await send({"type": "http.response.body", "body": texto.encode(), "more_body": True})
+
+        try:
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ] + self.cors_headers(scope)})
+            await enviar(f"retry: {EVENTOS_RETRY_MS}\n\n")
+            if assinatura.gap:
+                await enviar(format_sse([(assinatura.start_id, "reset", "{}")]))
+            fim = loop.time() + EVENTOS_DURACAO_MAX
+            while loop.time() < fim and not desconexao.done():
+                eventos = assinatura.get(0)
+                if eventos:
+                    # Com o cliente lento o send espera o socket esvaziar e a fila da assinatura enche
+                    await enviar(format_sse(eventos))
+                    continue
+                if assinatura.overflowed:
+                    break
+                espera = asyncio.ensure_future(acordar.wait())
+                done, _ = await asyncio.wait({espera, desconexao}, timeout=min(EVENTOS_HEARTBEAT, fim - loop.time()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                espera.cancel()
+                if not done:
+                    await enviar(": ping\n\n")
+                acordar.clear()
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            desconexao.cancel()
+            assinatura.close()
+
+    async def aguardar_desconexao(self, receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def admitir(self, scope, send, payload, classe):
+        # Mesma admissão do Flask (admitir()): limite de taxa por cliente e de concorrência da classe;
+        # devolve o limitador ocupado (a liberar) ou None se a resposta de recusa já foi enviada
+        if rate_limiter is not None:
+            cliente = f"u:{payload['sub']}" if payload else f"ip:{(scope.get('client') or ('',))[0]}"
+            espera = rate_limiter.consumir(cliente)
+            if espera:
+                await self.send_json(scope, send, 429, {"error": "Muitas requisições, tente novamente em instantes"},
+                                     [("retry-after", str(max(1, round(espera))))])
+                return None
+        limitador = limitadores[classe]
+        if not await limitador.acquire_async():
+            await self.send_json(scope, send, 503, {"error": "Servidor ocupado, tente novamente"},
+                                 [("retry-after", "1")])
+            return None
+        return limitador
+
+    async def clima(self, scope, receive, send):
+        payload, erro = self.autenticar(scope)
+        if erro:
+            await self.send_json(scope, send, 401, {"error": erro})
+            return
+        limitador = await self.admitir(scope, send, payload, "externa")
+        if limitador is None:
+            return
+        try:
+            await self.clima_admitido(scope, send)
+        finally:
+            limitador.release()
+
+    async def clima_admitido(self, scope, send):
+        async def fetch():
+            async with self.semaphore:
+                response = await self.http.get(clima_client.url, params=clima_client.params)
+                response.raise_for_status()
+                return response.json()
+
+        try:
+            data, idade, estado = await clima_client.obter_async(fetch)
+            await self.send_json(scope, send, 200, data, [("age", str(int(idade))), ("x-cache", estado)])
+            return
+        except CircuitOpen as e:
+            await self.send_json(scope, send, 503, {"error": str(e)},
+                                 [("retry-after", str(max(1, int(e.retry_after))))])
+            return
+        except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+            error_msg = f"Timeout ao acessar API do clima: {str(e)}"
+        except httpx.ConnectError as e:
+            error_msg = f"Erro de conexão com API do clima: {str(e)}"
+        except httpx.HTTPStatusError as e:
+            error_msg = f"Erro HTTP da API do clima: {str(e)}"
+        except httpx.HTTPError as e:
+            error_msg = f"Erro geral ao obter dados climáticos: {str(e)}"
+        except Exception as e:
+            error_msg = f"Erro inesperado: {str(e)}"
+        app.logger.warning(error_msg)
+        await self.send_json(scope, send, 500, {"error": error_msg})
+
+
+application = KanbanASGI(app)
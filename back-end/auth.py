@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class TokenInvalido(Exception):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class TokenSigner:
+    """
+    Tokens de sessão sem estado: payload JSON + assinatura HMAC-SHA256, com expiração.
+    A verificação é feita só em memória, sem consultar o banco.
+    """
+
+    def __init__(self, secret, ttl=28800):
+        self.secret = secret if isinstance(secret, bytes) else secret.encode()
+        self.ttl = ttl
+
+    def _sign(self, body):
+        return _b64encode(hmac.new(self.secret, body.encode(), hashlib.sha256).digest())
+
+    def emitir(self, user_id, usuario):
+        payload = {"sub": user_id, "usr": usuario, "exp": int(time.time()) + self.ttl}
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        return f"{body}.{self._sign(body)}"
+
+    def verificar(self, token):
+        try:
+            body, signature = token.split(".")
+        except ValueError:
+            raise TokenInvalido("Token malformado")
+        # Compara bytes: compare_digest recusa str com caracteres não ASCII (TypeError)
+        try:
+            valida = hmac.compare_digest(signature.encode(), self._sign(body).encode())
+        except UnicodeError:
+            raise TokenInvalido("Token malformado")
+        if not valida:
+            raise TokenInvalido("Assinatura inválida")
+        try:
+            payload = json.loads(_b64decode(body))
+        except ValueError:
+            raise TokenInvalido("Token malformado")
+        if payload.get("exp", 0) < time.time():
+            raise TokenInvalido("Token expirado")
+        return payload
+
+
+def hash_senha(senha, iteracoes):
+    return generate_password_hash(senha, method=f"pbkdf2:sha256:{iteracoes}")
+
+
+def senha_em_hash(armazenada):
+    return armazenada.startswith(("pbkdf2:", "scrypt:"))
+
+
+def precisa_rehash(armazenada, iteracoes):
+    # Senhas legadas em texto puro ou com custo diferente do configurado
+    return not armazenada.startswith(f"pbkdf2:sha256:{iteracoes}$")
+
+
+def hash_senhas_legadas(conn, iteracoes):
+    # Converte as senhas ainda em texto puro (usuários que não fizeram login desde a migração)
+    legadas = [(id_, senha) for id_, senha in conn.execute("SELECT ID, senha FROM Usuario WHERE senha != ''").fetchall()
+               if not senha_em_hash(senha)]
+    conn.executemany("UPDATE Usuario SET senha = ? WHERE ID = ?",
+                     [(hash_senha(senha, iteracoes), id_) for id_, senha in legadas])
+    return len(legadas)
+
+
+def conferir_senha(armazenada, senha):
+    if senha_em_hash(armazenada):
+        return check_password_hash(armazenada, senha)
+    return hmac.compare_digest(armazenada.encode(), senha.encode())
+
+
+class LoginCache:
+    """
+    LRU de logins verificados recentemente, para não recalcular o hash caro a cada tentativa.
+    A chave é um HMAC de (usuário, senha) com o segredo do servidor, então a senha não fica em memória;
+    o valor é o hash armazenado no momento da verificação: se a senha mudar no banco, o acerto deixa de valer.
+    """
+
+    def __init__(self, secret, max_size=1024):
+        self.secret = secret if isinstance(secret, bytes) else secret.encode()
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, usuario, senha):
+        return hmac.new(self.secret, f"{usuario}\0{senha}".encode(), hashlib.sha256).digest()
+
+    def verificado(self, usuario, senha, armazenada):
+        key = self._key(usuario, senha)
+        with self._lock:
+            if self._entries.get(key) == armazenada:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def registrar(self, usuario, senha, armazenada):
+        key = self._key(usuario, senha)
+        with self._lock:
+            self._entries[key] = armazenada
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -1,32 +1,484 @@
+import hmac
+import json
+import os
+import re
 import sqlite3
+import time
 import requests
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flasgger import Swagger
 from flask_cors import CORS
+from aggregates import DIMENSOES, divergencias, reconstruir
+from admission import ConcurrencyLimiter, TokenBucket, parse_limites
+from auth import LoginCache, TokenInvalido, TokenSigner, conferir_senha, hash_senha, precisa_rehash
+from clima_client import CircuitOpen, ClimaClient
+from compression import Compressor
+from conditional import ConditionalGet
+from db_pool import ConnectionPool, PoolExhausted
+from events import EventBroadcaster, SQLiteEventLog, TooManySubscribers, format_sse
+from lookup_cache import LookupCache
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics
+from migrations import apply_migrations
+from query_profiler import QueryProfiler
+from serialization import FastJSONProvider, RawJSON, json_array, json_object_sql
+from writer import GroupCommitWriter, WriteTimeout
 
 app = Flask(__name__)
+# JSON com orjson quando instalado; listagens serializam as tuplas do cursor direto (ver serialization.py)
+app.json = FastJSONProvider(app)
+# Latência, status, bytes e SQL por endpoint, exportados em /metrics (formato Prometheus)
+metrics = Metrics(app)
 # CORS configurado para aceitar requisições de qualquer origem
-CORS(app, supports_credentials=True, origins=["http://localhost:8080", "http://frontend:8080", "http://127.0.0.1:8080"])
-dbname = 'database.db'
+CORS_ORIGINS = ["http://localhost:8080", "http://frontend:8080", "http://127.0.0.1:8080"]
+CORS(app, supports_credentials=True, origins=CORS_ORIGINS)
+dbname = os.environ.get('DATABASE_PATH', 'database.db')
 swagger = Swagger(app)
 
+# Compressão negociada por Accept-Encoding; listagens em streaming usam níveis mais leves
+if os.environ.get('COMPRESSAO', '1') != '0':
+    nivel_listagem = {"gzip": 5, "br": 4, "zstd": 3}
+    Compressor(
+        app,
+        min_size=int(os.environ.get('COMPRESSAO_MIN_BYTES', 1024)),
+        route_levels={
+            "get_tarefas": nivel_listagem,
+            "get_tarefas_por_status": nivel_listagem,
+            "get_tarefas_por_usuario": nivel_listagem,
+        },
+        excluded_endpoints={"health_check"},
+    )
+
+# Aplica as migrações pendentes (índices etc.) antes de atender requisições
+apply_migrations(dbname)
+
+# Pool de conexões: cada requisição empresta uma conexão já configurada (WAL, cache, mmap)
+pool = ConnectionPool(
+    dbname,
+    max_size=int(os.environ.get('DB_POOL_SIZE', 8)),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+)
+pool.observers.append(metrics.observe_statement)
+
+# Perfil de consultas, opcional: com SLOW_QUERY_MS definido, comandos acima desse tempo vão para o log
+# com o EXPLAIN QUERY PLAN, e o agregado por SQL normalizado fica em /debug/queries
+query_profiler = None
+if os.environ.get('SLOW_QUERY_MS'):
+    query_profiler = QueryProfiler(dbname, float(os.environ['SLOW_QUERY_MS']), logger=app.logger)
+    query_profiler.init_app(app)
+    pool.observers.append(query_profiler.observe)
+
+# Status, Prioridade, Categoria e nomes de usuário servidos da memória
+lookup_cache = LookupCache()
+
+# Feed de alterações das tarefas (SSE em /tarefas/eventos). Por padrão os eventos ficam no
+# processo; com EVENTOS_FANOUT=sqlite passam pela tabela eventos e chegam a todos os workers.
+# No WSGI cada conexão ocupa uma thread: o padrão é no máximo metade delas (o pool acompanha
+# THREADS); no modo assíncrono (asgi.py) o feed roda no event loop e o limite é maior.
+EVENTOS_HEARTBEAT = float(os.environ.get('EVENTOS_HEARTBEAT', 15))
+EVENTOS_DURACAO_MAX = float(os.environ.get('EVENTOS_DURACAO_MAX', 300))
+EVENTOS_RETRY_MS = 3000
+broadcaster = EventBroadcaster(
+    history=int(os.environ.get('EVENTOS_HISTORICO', 1000)),
+    max_pending=int(os.environ.get('EVENTOS_FILA', 256)),
+    max_subscribers=int(os.environ.get('EVENTOS_MAX_CONEXOES', max(1, pool.max_size // 2))),
+)
+event_log = SQLiteEventLog(dbname, broadcaster) if os.environ.get('EVENTOS_FANOUT') == 'sqlite' else None
+
 def data_base_connection():
-    conn = sqlite3.connect(dbname)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Reaproveita a mesma conexão durante toda a requisição
+    if 'db_conn' not in g:
+        g.db_conn = pool.acquire()
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_data_base_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        pool.release(conn)
+
+# Escritas das rotas unitárias passam por um escritor único por processo, que executa as
+# operações em lotes com um só commit (ver writer.py); ESCRITA_AGRUPADA=0 faz o commit
+# na conexão da própria requisição
+writer = None
+if os.environ.get('ESCRITA_AGRUPADA', '1') != '0':
+    writer = GroupCommitWriter(
+        pool.connect,
+        max_batch=int(os.environ.get('ESCRITA_LOTE_MAX', 64)),
+        max_delay=float(os.environ.get('ESCRITA_JANELA_MS', 1)) / 1000,
+        timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        # Comandos da operação contam para a rota que a enviou (métricas e /debug/queries)
+        contexts=[metrics] + ([query_profiler] if query_profiler is not None else []),
+    )
+
+def escrever(operacao, evento=None):
+    # Executa operacao(conn) em uma transação confirmada e devolve o seu retorno;
+    # exceções da operação (ex. IntegrityError) chegam a quem chamou, com a escrita desfeita.
+    # evento(resultado) -> evento_json(...) ou vazio: alteração publicada no feed de eventos
+    def executar(conn):
+        resultado = operacao(conn)
+        if evento is not None and event_log is not None:
+            # Fan-out sqlite: o evento entra na mesma transação (atômico, sem segundo commit)
+            gravar_evento(conn, evento(resultado))
+        return resultado
+
+    if writer is not None:
+        resultado = writer.submit(executar)
+    else:
+        conn = data_base_connection()
+        try:
+            resultado = executar(conn)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    if evento is not None and event_log is None:
+        publicar_evento(evento(resultado))
+    return resultado
+
+def evento_json(tipo, **dados):
+    # Só ids e status, o cliente busca o restante se precisar
+    return tipo, app.json.dumps(dados, separators=(",", ":"))
+
+def gravar_evento(conn, evento):
+    if evento and event_log is not None:
+        event_log.append(conn, *evento)
+
+def publicar_evento(evento):
+    # Sem fan-out sqlite: entrega direta às assinaturas do processo, depois do commit
+    if evento and event_log is None:
+        broadcaster.publish(*evento)
 
-def format_date_br(date_str):
-    # Aceita yyyy-mm-dd ou yyyy-mm-ddTHH:MM:SS
-    if not date_str:
+def confirmar(conn, evento=None):
+    # Commit das rotas em lote (transação na conexão da requisição) junto com o seu evento
+    gravar_evento(conn, evento)
+    conn.commit()
+    publicar_evento(evento)
+
+def ler_configuracao(chave):
+    conn = pool.acquire()
+    try:
+        row = conn.execute("SELECT valor FROM Configuracao WHERE chave = ?", (chave,)).fetchone()
+        return row["valor"] if row else None
+    finally:
+        pool.release(conn)
+
+# Tokens de sessão assinados (HMAC); o segredo é o mesmo para todos os workers:
+# AUTH_SECRET ou, na falta dele, o gerado pela migração em Configuracao
+AUTH_SECRET = os.environ.get('AUTH_SECRET') or ler_configuracao('auth_secret')
+SENHA_HASH_ITERACOES = int(os.environ.get('SENHA_HASH_ITERACOES', 600000))
+AUTH_OBRIGATORIA = os.environ.get('AUTH_OBRIGATORIA') == '1'
+token_signer = TokenSigner(AUTH_SECRET, ttl=int(os.environ.get('TOKEN_TTL', 28800)))
+login_cache = LoginCache(AUTH_SECRET, max_size=int(os.environ.get('LOGIN_CACHE_SIZE', 1024)))
+# Endpoints que dispensam token mesmo com AUTH_OBRIGATORIA=1
+ENDPOINTS_PUBLICOS = {"login", "adicionar_usuario", "health_check", "metrics_endpoint", "static"}
+
+@app.before_request
+def autenticar():
+    # Valida o token Bearer apenas em memória; g.usuario_id fica disponível para os handlers
+    g.usuario_id = None
+    auth = request.headers.get("Authorization", "")
+    if not auth and request.endpoint == "eventos_tarefas" and request.args.get("access_token"):
+        # O EventSource do navegador não envia cabeçalhos: o token vem na query string
+        auth = "Bearer " + request.args["access_token"]
+    if auth.startswith("Bearer "):
+        try:
+            payload = token_signer.verificar(auth[7:].strip())
+        except TokenInvalido as e:
+            return jsonify({"error": str(e)}), 401
+        g.usuario_id = payload["sub"]
+        g.usuario = payload["usr"]
+    elif (AUTH_OBRIGATORIA and request.method != "OPTIONS"
+          and request.endpoint not in ENDPOINTS_PUBLICOS
+          and not (request.endpoint or "").startswith(("flasgger", "health"))):
+        return jsonify({"error": "Token de acesso obrigatório"}), 401
+
+# Controle de admissão: limite de taxa por cliente (usuário do token ou IP) e
+# limite de concorrência por classe de rota, recusando cedo com 429/503 + Retry-After
+LIMITES_PADRAO = {"leitura": (32, 64), "varredura": (4, 8), "escrita": (4, 16), "externa": (4, 4)}
+CLASSES_ROTA = {
+    "get_tarefas": "varredura",
+    "get_tarefas_por_status": "varredura",
+    "get_tarefas_por_usuario": "varredura",
+    "get_tarefas_detalhes": "varredura",
+    "buscar_tarefas": "varredura",
+    "get_board": "varredura",
+    "get_clima": "externa",
+}
+limitadores = {
+    classe: ConcurrencyLimiter(concorrentes, fila, queue_timeout=float(os.environ.get('ADMISSAO_ESPERA', 1)))
+    for classe, (concorrentes, fila) in parse_limites(os.environ.get('ADMISSAO_LIMITES'), LIMITES_PADRAO).items()
+}
+RATE_LIMIT = float(os.environ.get('RATE_LIMIT', 20))
+rate_limiter = TokenBucket(RATE_LIMIT, float(os.environ.get('RATE_BURST', 40))) if RATE_LIMIT > 0 else None
+
+def classe_da_rota():
+    endpoint = request.endpoint or ""
+    if request.method == "OPTIONS" or endpoint.startswith(("health", "metrics", "flasgger", "static")):
         return None
+    if endpoint in CLASSES_ROTA:
+        return CLASSES_ROTA[endpoint]
+    return "leitura" if request.method in ("GET", "HEAD") else "escrita"
+
+@app.before_request
+def admitir():
+    classe = classe_da_rota()
+    if classe is None:
+        return None
+    if rate_limiter is not None:
+        cliente = f"u:{g.usuario_id}" if g.get("usuario_id") else f"ip:{request.remote_addr}"
+        espera = rate_limiter.consumir(cliente)
+        if espera:
+            response = jsonify({"error": "Muitas requisições, tente novamente em instantes"})
+            response.headers["Retry-After"] = str(max(1, round(espera)))
+            return response, 429
+    limitador = limitadores.get(classe)
+    if limitador is None:
+        return None
+    if not limitador.acquire():
+        response = jsonify({"error": "Servidor ocupado, tente novamente"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    g.limitador = limitador
+
+@app.teardown_request
+def liberar_admissao(exc):
+    limitador = g.pop("limitador", None)
+    if limitador is not None:
+        limitador.release()
+
+# GET condicional: ETag a partir das versões (tabela_versao) das tabelas lidas por cada rota;
+# If-None-Match ainda válido recebe 304 antes da consulta. Toda tabela lida pelo SQL da rota
+# (inclusive JOINs e subconsultas) precisa estar na lista, senão a rota responde 304 desatualizado.
+TABELAS_ROTA = {
+    "get_tarefas": ("Tarefas",),
+    "get_tarefas_por_status": ("Tarefas",),
+    "get_tarefas_por_usuario": ("Tarefas",),
+    "sincronizar_tarefas": ("Tarefas",),
+    "get_board": ("Tarefas", "Status", "categoria_tarefa"),
+    "get_tarefa_por_id": ("Tarefas", "Prioridade", "Status", "Usuario"),
+    "get_tarefas_detalhes": ("Tarefas", "Prioridade", "Status", "Usuario", "Categoria", "categoria_tarefa"),
+    "get_categorias_da_tarefa": ("Categoria", "categoria_tarefa"),
+    "get_categoria": ("Categoria",),
+    "get_prioridades": ("Prioridade",),
+    "get_status": ("Status",),
+    "get_usuarios": ("Usuario",),
+    # get_estatisticas fica de fora: as atrasadas mudam com a data, sem escrita no banco
+}
+# Identificador aleatório do banco (migração 6): entra nos ETags e nos tokens de /tarefas/sync
+INSTANCIA_BANCO = ler_configuracao('instancia') or ""
+conditional = ConditionalGet(
+    app,
+    connection=data_base_connection,
+    route_tables=TABELAS_ROTA,
+    instance=INSTANCIA_BANCO,
+    # NDJSON negociado pelo Accept é outra representação da mesma URL
+    variant=lambda: "ndjson" if formato_stream() == "ndjson" else "",
+)
+
+@app.errorhandler(PoolExhausted)
+def handle_pool_exhausted(e):
+    return jsonify({"error": "Servidor ocupado, tente novamente"}), 503
+
+@app.errorhandler(WriteTimeout)
+def handle_write_timeout(e):
+    return jsonify({"error": "Servidor ocupado, tente novamente"}), 503
+
+class ParametroInvalido(ValueError):
+    pass
+
+@app.errorhandler(ParametroInvalido)
+def handle_parametro_invalido(e):
+    return jsonify({"error": str(e)}), 400
+
+# Colunas de Tarefas expostas pela API (também aceitas na projeção fields=)
+COLUNAS_TAREFA = ("ID", "Titulo", "Descricao_tarefa", "Data_de_criacao", "Prazo_de_conclusao",
+                  "Tempo_estimado", "fk_prioridade", "fk_status", "fk_usuario")
+# Filtros aceitos na query string -> coluna de Tarefas
+FILTROS_TAREFA = {"status": "fk_status", "usuario": "fk_usuario", "prioridade": "fk_prioridade"}
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 500
+
+def montar_where_tarefas(filtros, categorias=None):
+    # Filtros combináveis sobre Tarefas: valor único (=) ou lista (IN); categorias via categoria_tarefa
+    where, params = [], []
+    for coluna, valores in (filtros or {}).items():
+        if len(valores) == 1:
+            where.append(f"{coluna} = ?")
+        else:
+            where.append(f"{coluna} IN ({', '.join('?' * len(valores))})")
+        params.extend(valores)
+    if categorias:
+        where.append(
+            "EXISTS (SELECT 1 FROM categoria_tarefa ct WHERE ct.fk_tarefa = Tarefas.ID"
+            f" AND ct.fk_categoria IN ({', '.join('?' * len(categorias))}))"
+        )
+        params.extend(categorias)
+    return where, params
+
+def montar_consulta_tarefas(colunas=COLUNAS_TAREFA, filtros=None, cursor=None, limite=None):
+    # Único construtor de SELECT sobre Tarefas: filtros combináveis (valor ou lista -> IN),
+    # paginação por chave (ID > cursor) e limite. Busca limite + 1 linhas para saber se há próxima página.
+    # Cada linha é (ID, objeto JSON da tarefa já serializado pelo SQLite).
+    where, params = montar_where_tarefas(filtros)
+    if cursor is not None:
+        where.append("ID > ?")
+        params.append(cursor)
+    sql = f"SELECT ID, {json_object_sql(colunas)} FROM Tarefas"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ID"
+    if limite is not None:
+        sql += " LIMIT ?"
+        params.append(limite + 1)
+    return sql, params
+
+def _inteiro(valor, nome):
     try:
-        parts = date_str.split("T")[0].split("-")
-        if len(parts) == 3:
-            y, m, d = parts
-            return f"{d.zfill(2)}/{m.zfill(2)}/{y}"
-    except Exception:
-        pass
-    return date_str
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f"Parâmetro {nome} deve ser inteiro")
+
+def _inteiros(args, nome):
+    return [_inteiro(v, nome) for v in args[nome].split(",")] if args.get(nome) else []
+
+def ler_filtros(**fixos):
+    # Filtros status/usuario/prioridade da query string; filtros da rota (fixos) têm precedência
+    filtros = {}
+    for nome, coluna in FILTROS_TAREFA.items():
+        valores = _inteiros(request.args, nome)
+        if valores:
+            filtros[coluna] = valores
+    for coluna, valor in fixos.items():
+        filtros[coluna] = [valor]
+    return filtros
+
+def ler_campos(obrigatorias=("ID",)):
+    # Projeção fields=; as colunas obrigatórias são sempre retornadas
+    if not request.args.get("fields"):
+        return COLUNAS_TAREFA
+    pedidas = [c.strip() for c in request.args["fields"].split(",") if c.strip()]
+    invalidas = [c for c in pedidas if c not in COLUNAS_TAREFA]
+    if invalidas:
+        raise ParametroInvalido(f"Campos inválidos em fields: {', '.join(invalidas)}")
+    return tuple(c for c in COLUNAS_TAREFA if c in obrigatorias or c in pedidas)
+
+def ler_parametros_listagem(**fixos):
+    # Lê fields, filtros, cursor e limit da query string
+    args = request.args
+    filtros = ler_filtros(**fixos)
+    # ID é sempre retornado: é a chave da paginação
+    colunas = ler_campos()
+
+    paginado = "limit" in args or "cursor" in args
+    cursor = _inteiro(args["cursor"], "cursor") if args.get("cursor") else None
+    limite = None
+    if paginado:
+        limite = _inteiro(args.get("limit", LIMITE_PADRAO), "limit")
+        if not 1 <= limite <= LIMITE_MAXIMO:
+            raise ParametroInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    return colunas, filtros, cursor, limite
+
+TAMANHO_LOTE_STREAM = 500
+MIMETYPE_NDJSON = "application/x-ndjson"
+
+def formato_stream():
+    # NDJSON via Accept (ou format=ndjson); array JSON em streaming via stream=1
+    if request.args.get("format") == "ndjson":
+        return "ndjson"
+    if request.accept_mimetypes.best_match(["application/json", MIMETYPE_NDJSON]) == MIMETYPE_NDJSON:
+        return "ndjson"
+    if request.args.get("stream") in ("1", "true"):
+        return "json"
+    return None
+
+def cursor_tuplas(conn):
+    # Cursor sem row_factory: tuplas simples, sem criar um sqlite3.Row por linha
+    cur = conn.cursor()
+    cur.row_factory = None
+    return cur
+
+def gerar_linhas_stream(cur, formato, limite=None):
+    # Percorre o cursor com fetchmany: a memória por requisição fica limitada ao tamanho do lote.
+    # Em modo paginado o next_cursor vai no final (fecha o objeto JSON ou última linha do NDJSON).
+    def dumps(obj):
+        return app.json.dumps(obj, separators=(",", ":"))
+
+    if formato == "json":
+        yield '{"tarefas":[' if limite is not None else "["
+    enviados = 0
+    ultimo_id = None
+    tem_mais = False
+    while not tem_mais:
+        rows = cur.fetchmany(TAMANHO_LOTE_STREAM)
+        if not rows:
+            break
+        if limite is not None and enviados + len(rows) > limite:
+            rows = rows[:limite - enviados]
+            tem_mais = True
+        if not rows:
+            break
+        partes = [tarefa for _, tarefa in rows]
+        if formato == "json":
+            yield ("," if enviados else "") + ",".join(partes)
+        else:
+            yield "\n".join(partes) + "\n"
+        enviados += len(rows)
+        ultimo_id = rows[-1][0]
+
+    if limite is None:
+        if formato == "json":
+            yield "]"
+        return
+    next_cursor = ultimo_id if tem_mais else None
+    if formato == "json":
+        yield '],"next_cursor":' + dumps(next_cursor) + "}"
+    else:
+        yield dumps({"next_cursor": next_cursor}) + "\n"
+
+def responder_stream(cur, formato, limite=None):
+    mimetype = MIMETYPE_NDJSON if formato == "ndjson" else "application/json"
+    # stream_with_context mantém a conexão emprestada até o gerador terminar
+    return Response(stream_with_context(gerar_linhas_stream(cur, formato, limite)), mimetype=mimetype)
+
+def listar_tarefas(**fixos):
+    colunas, filtros, cursor, limite = ler_parametros_listagem(**fixos)
+    sql, params = montar_consulta_tarefas(colunas, filtros, cursor, limite)
+    cur = cursor_tuplas(data_base_connection())
+    cur.execute(sql, params)
+    formato = formato_stream()
+    if formato:
+        return responder_stream(cur, formato, limite)
+    rows = cur.fetchall()
+    if limite is None:
+        # Sem paginação: mantém o formato original (lista simples)
+        return app.json.compose_response(json_array(tarefa for _, tarefa in rows))
+
+    next_cursor = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        next_cursor = rows[-1][0]
+    return app.json.compose_response({"tarefas": json_array(tarefa for _, tarefa in rows), "next_cursor": next_cursor})
+
+def _zfill_sql(valor):
+    return f"CASE WHEN length({valor}) < 2 THEN substr('00' || {valor}, -2) ELSE {valor} END"
+
+def data_br_sql(coluna):
+    # dd/mm/aaaa calculado pelo SQLite, com o mesmo resultado do antigo format_date_br:
+    # a parte antes do T é dividida em ano-mês-dia e mês/dia são completados com zero
+    # (2025-9-6 -> 06/09/2025); sem exatamente dois "-" o valor volta como está e vazio vira null.
+    # O caso comum (aaaa-mm-dd[T...]) é resolvido antes, só com substr
+    data = f"substr({coluna}, 1, instr({coluna} || 'T', 'T') - 1)"
+    resto = f"substr({data}, instr({data}, '-') + 1)"
+    ano = f"substr({data}, 1, instr({data}, '-') - 1)"
+    mes = f"substr({resto}, 1, instr({resto}, '-') - 1)"
+    dia = f"substr({resto}, instr({resto}, '-') + 1)"
+    iso = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+    return (f"CASE WHEN {coluna} GLOB '{iso}' OR {coluna} GLOB '{iso}T*'"
+            f" THEN substr({coluna}, 9, 2) || '/' || substr({coluna}, 6, 2) || '/' || substr({coluna}, 1, 4)"
+            f" WHEN {coluna} IS NULL OR {coluna} = '' THEN NULL"
+            f" WHEN length({data}) - length(replace({data}, '-', '')) = 2"
+            f" THEN {_zfill_sql(dia)} || '/' || {_zfill_sql(mes)} || '/' || {ano}"
+            f" ELSE {coluna} END")
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -47,6 +499,84 @@ def health_check():
     """
     return jsonify({"status": "ok"}), 200
 
+@app.route('/health/pool', methods=['GET'])
+def health_pool():
+    """
+    Estatísticas do pool de conexões com o banco
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Contadores do pool (conexões criadas, em uso, empréstimos e esperas)
+        schema:
+          type: object
+          properties:
+            max_size:
+              type: integer
+            created:
+              type: integer
+            in_use:
+              type: integer
+            idle:
+              type: integer
+            checkouts:
+              type: integer
+            waits:
+              type: integer
+            wait_time_s:
+              type: number
+            timeouts:
+              type: integer
+            escritor:
+              type: object
+              description: Lotes e operações do escritor agrupado (null com ESCRITA_AGRUPADA=0)
+    """
+    return jsonify(dict(pool.stats(), escritor=writer.stats() if writer is not None else None)), 200
+
+@app.route('/health/cache', methods=['GET'])
+def health_cache():
+    """
+    Estatísticas do cache das tabelas de apoio
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Acertos, cargas e verificações de versão do cache
+        schema:
+          type: object
+          properties:
+            hits:
+              type: integer
+            misses:
+              type: integer
+            version_checks:
+              type: integer
+            tabelas:
+              type: object
+            etag:
+              type: object
+              description: Respostas 304 e releituras de tabela_versao do GET condicional
+    """
+    return jsonify(dict(lookup_cache.stats(), etag=conditional.stats())), 200
+
+@app.route('/health/admission', methods=['GET'])
+def health_admission():
+    """
+    Contadores do controle de admissão
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Por classe de rota (leitura, varredura, escrita, externa) requisições ativas, em espera, admitidas e recusadas; e total limitado por taxa
+    """
+    return jsonify({
+        "classes": {classe: limitador.stats() for classe, limitador in limitadores.items()},
+        "rate_limited": rate_limiter.limited if rate_limiter else 0,
+    }), 200
+
 @app.route('/categoria', methods=['GET'])
 def get_categoria():
     """
@@ -72,12 +602,7 @@ def get_categoria():
                 type: string
                 description: Descrição da categoria
     """
-    conn = data_base_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM Categoria")
-    rows = cursor.fetchall()
-    categories = [dict(row) for row in rows]
-    conn.close()
+    categories = lookup_cache.rows(data_base_connection(), "Categoria")
     return jsonify(categories)
 
 @app.route('/login', methods=['POST'])
@@ -115,6 +640,12 @@ def login():
               type: integer
             usuario:
               type: string
+            token:
+              type: string
+              description: Token de sessão assinado; envie em Authorization como Bearer <token>
+            expires_in:
+              type: integer
+              description: Validade do token em segundos
             message:
               type: string
       401:
@@ -134,22 +665,34 @@ def login():
 
     conn = data_base_connection()
     cur = conn.cursor()
-    # Tabela: Usuario | Campos: Nome_usuario, senha
+    # Tabela: Usuario | Campos: Nome_usuario, senha (hash)
     cur.execute("""
-        SELECT rowid AS id, Nome_usuario
+        SELECT ID AS id, Nome_usuario, senha
         FROM Usuario
-        WHERE Nome_usuario = ? AND senha = ?
+        WHERE Nome_usuario = ?
         LIMIT 1
-    """, (usuario, senha))
+    """, (usuario,))
     row = cur.fetchone()
-    conn.close()
-
-    if not row:
+    if not row or not row["senha"]:
         return jsonify({"error": "Credenciais inválidas"}), 401
 
+    armazenada = row["senha"]
+    # Logins recentes pulam o cálculo do hash
+    if not login_cache.verificado(usuario, senha, armazenada):
+        if not conferir_senha(armazenada, senha):
+            return jsonify({"error": "Credenciais inválidas"}), 401
+        # Hashes com outro custo (SENHA_HASH_ITERACOES mudou) são refeitos no login; as senhas
+        # legadas em texto puro já foram convertidas pela migração 9
+        if precisa_rehash(armazenada, SENHA_HASH_ITERACOES):
+            armazenada = hash_senha(senha, SENHA_HASH_ITERACOES)
+            escrever(lambda conn: conn.execute("UPDATE Usuario SET senha = ? WHERE ID = ?", (armazenada, row["id"])))
+        login_cache.registrar(usuario, senha, armazenada)
+
     return jsonify({
         "user_id": row["id"],
         "usuario": row["Nome_usuario"],
+        "token": token_signer.emitir(row["id"], row["Nome_usuario"]),
+        "expires_in": token_signer.ttl,
         "message": "Login bem-sucedido"
     }), 200
 
@@ -193,17 +736,15 @@ def adicionar_usuario():
     if not nome_usuario or not senha:
         return jsonify({"error": "Nome_usuario e senha obrigatórios"}), 400
 
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT rowid FROM Usuario WHERE Nome_usuario = ?", (nome_usuario,))
-    if cur.fetchone():
-        conn.close()
+    # O hash (PBKDF2) é calculado fora do escritor, que só executa o INSERT
+    senha_hash = hash_senha(senha, SENHA_HASH_ITERACOES)
+    # O índice único em Usuario(Nome_usuario) garante a unicidade
+    try:
+        user_id = escrever(lambda conn: conn.execute(
+            "INSERT INTO Usuario (Nome_usuario, senha) VALUES (?, ?)", (nome_usuario, senha_hash)).lastrowid)
+    except sqlite3.IntegrityError:
         return jsonify({"error": "Usuário já existe"}), 400
-
-    cur.execute("INSERT INTO Usuario (Nome_usuario, senha) VALUES (?, ?)", (nome_usuario, senha))
-    conn.commit()
-    user_id = cur.lastrowid
-    conn.close()
+    lookup_cache.invalidar("Usuario")
     return jsonify({"id": user_id, "message": "Usuário adicionado com sucesso"}), 201
 
 # -------------------------------
@@ -216,9 +757,51 @@ def get_tarefas():
     ---
     tags:
       - Tarefas
+    parameters:
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_status (aceita lista separada por vírgula)
+      - name: usuario
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_usuario (aceita lista separada por vírgula)
+      - name: prioridade
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_prioridade (aceita lista separada por vírgula)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas separadas por vírgula (ex. ID,Titulo,fk_status). ID é sempre incluído
+      - name: cursor
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas tarefas com ID maior que o cursor (use o next_cursor da página anterior)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (1 a 500). Com limit ou cursor a resposta vem paginada
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: Envia o array JSON em streaming (memória constante no servidor)
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson]
+        required: false
+        description: NDJSON em streaming, uma tarefa por linha (equivale a Accept application/x-ndjson)
     responses:
       200:
-        description: Lista de tarefas obtida com sucesso
+        description: Lista de tarefas obtida com sucesso (ou objeto {tarefas, next_cursor} quando paginada)
         schema:
           type: array
           items:
@@ -234,14 +817,7 @@ def get_tarefas():
                 type: string
                 description: Status usado no Kanban
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
-    # Tabela: Tarefas | Campos mínimos esperados: id, titulo, descricao, fk_status
-    cur.execute("SELECT * FROM Tarefas")
-    rows = cur.fetchall()
-    tarefas = [dict(r) for r in rows]
-    conn.close()
-    return jsonify(tarefas), 200
+    return listar_tarefas()
 
 
 
@@ -259,9 +835,45 @@ def get_tarefas_por_status(status_id):
         type: integer
         required: true
         description: ID do status (fk_status) para filtrar as tarefas
+      - name: usuario
+        in: query
+        type: string
+        required: false
+        description: Filtra também por fk_usuario (aceita lista separada por vírgula)
+      - name: prioridade
+        in: query
+        type: string
+        required: false
+        description: Filtra também por fk_prioridade (aceita lista separada por vírgula)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas separadas por vírgula (ex. ID,Titulo,fk_status). ID é sempre incluído
+      - name: cursor
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas tarefas com ID maior que o cursor (use o next_cursor da página anterior)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (1 a 500). Com limit ou cursor a resposta vem paginada
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: Envia o array JSON em streaming (memória constante no servidor)
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson]
+        required: false
+        description: NDJSON em streaming, uma tarefa por linha (equivale a Accept application/x-ndjson)
     responses:
       200:
-        description: Lista de tarefas com o fk_status informado
+        description: Lista de tarefas com o fk_status informado (ou objeto {tarefas, next_cursor} quando paginada)
         schema:
           type: array
           items:
@@ -280,14 +892,36 @@ def get_tarefas_por_status(status_id):
                 type: integer
                 description: ID do status (fk_status)
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM Tarefas WHERE fk_status = ?", (status_id,))
-    rows = cur.fetchall()
-    conn.close()
+    return listar_tarefas(fk_status=status_id)
+
+CAMPOS_OBRIGATORIOS_TAREFA = ["Titulo", "Descricao_tarefa", "Data_de_criacao",
+                              "Prazo_de_conclusao", "Tempo_estimado",
+                              "fk_prioridade", "fk_status", "fk_usuario"]
+
+SQL_INSERIR_TAREFA = """
+    INSERT INTO Tarefas
+    (Titulo, Descricao_tarefa, Data_de_criacao, Prazo_de_conclusao, Tempo_estimado, fk_prioridade, fk_status, fk_usuario)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-    tarefas = [dict(r) for r in rows]
-    return jsonify(tarefas), 200
+CAMPOS_FK_TAREFA = ("fk_prioridade", "fk_status", "fk_usuario")
+
+def validar_tarefa(data):
+    # Retorna a mensagem de erro ou None se a tarefa for válida
+    if not isinstance(data, dict) or not all(campo in data for campo in CAMPOS_OBRIGATORIOS_TAREFA):
+        return "Todos os campos obrigatórios devem ser informados"
+    # Objetos e listas não podem ser gravados pelo SQLite: recusados aqui, como erro do item
+    for campo in CAMPOS_OBRIGATORIOS_TAREFA:
+        valor = data[campo]
+        if campo in CAMPOS_FK_TAREFA:
+            if not _eh_inteiro(valor):
+                return f"{campo} deve ser um ID inteiro"
+        elif valor is not None and not isinstance(valor, (str, int, float)):
+            return f"{campo} deve ser texto ou número"
+    return None
+
+def valores_tarefa(data):
+    return tuple(data[campo] for campo in CAMPOS_OBRIGATORIOS_TAREFA)
 
 @app.route('/tarefas', methods=['POST'])
 def create_tarefa():
@@ -347,34 +981,136 @@ def create_tarefa():
     """
     data = request.get_json(silent=True) or {}
 
-    campos_obrigatorios = ["Titulo", "Descricao_tarefa", "Data_de_criacao", 
-                           "Prazo_de_conclusao", "Tempo_estimado", 
-                           "fk_prioridade", "fk_status", "fk_usuario"]
+    erro = validar_tarefa(data)
+    if erro:
+        return jsonify({"error": erro}), 400
+
+    tarefa_id = escrever(
+        lambda conn: conn.execute(SQL_INSERIR_TAREFA, valores_tarefa(data)).lastrowid,
+        lambda tarefa_id: evento_json("tarefa_criada", id=tarefa_id, fk_status=data["fk_status"],
+                                      fk_usuario=data["fk_usuario"]))
+
+    return jsonify({"id": tarefa_id, "message": "Tarefa criada com sucesso"}), 201
+
+LIMITE_LOTE = 5000
+
+def ler_itens_lote():
+    # Aceita um array JSON (ou {"tarefas": [...]}) ou NDJSON, uma tarefa por linha.
+    # Linhas NDJSON inválidas viram erro do item, sem abortar o lote.
+    if request.mimetype == MIMETYPE_NDJSON:
+        itens = []
+        for linha in request.stream:
+            if not linha.strip():
+                continue
+            try:
+                itens.append(json.loads(linha))
+            except ValueError:
+                itens.append(None)
+        return itens
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("tarefas")
+    if not isinstance(data, list):
+        raise ParametroInvalido("Envie um array de tarefas ou NDJSON")
+    return data
+
+@app.route('/tarefas/batch', methods=['POST'])
+def create_tarefas_batch():
+    """
+    Cria várias tarefas em uma única transação
+    ---
+    tags:
+      - Tarefas
+    consumes:
+      - application/json
+      - application/x-ndjson
+    parameters:
+      - in: body
+        name: tarefas
+        required: true
+        description: Array de tarefas (mesmos campos obrigatórios de POST /tarefas) ou NDJSON, uma por linha. Cada tarefa pode trazer categorias, uma lista de IDs de Categoria
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              Titulo:
+                type: string
+              categorias:
+                type: array
+                items:
+                  type: integer
+    responses:
+      201:
+        description: Tarefas válidas criadas; itens inválidos são reportados em erros
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              description: ID criado para cada item, na ordem enviada (null para itens inválidos)
+              items:
+                type: integer
+            erros:
+              type: array
+              items:
+                type: object
+                properties:
+                  indice:
+                    type: integer
+                  error:
+                    type: string
+            message:
+              type: string
+      400:
+        description: Nenhuma tarefa válida ou corpo inválido
+    """
+    itens = ler_itens_lote()
+    if len(itens) > LIMITE_LOTE:
+        raise ParametroInvalido(f"Máximo de {LIMITE_LOTE} tarefas por lote")
+
+    validos, erros = [], []
+    for indice, item in enumerate(itens):
+        erro = validar_tarefa(item) if item is not None else "Item inválido (JSON malformado ou nulo)"
+        categorias = item.get("categorias", []) if isinstance(item, dict) else []
+        if not erro and (not isinstance(categorias, list) or not all(isinstance(c, int) for c in categorias)):
+            erro = "categorias deve ser uma lista de IDs"
+        if erro:
+            erros.append({"indice": indice, "error": erro})
+        else:
+            validos.append((indice, item, categorias))
 
-    if not all(campo in data for campo in campos_obrigatorios):
-        return jsonify({"error": "Todos os campos obrigatórios devem ser informados"}), 400
+    if not validos:
+        return jsonify({"ids": [None] * len(itens), "erros": erros, "error": "Nenhuma tarefa válida"}), 400
 
     conn = data_base_connection()
     cur = conn.cursor()
+    # BEGIN IMMEDIATE reserva a escrita: com AUTOINCREMENT os IDs do lote são
+    # sequenciais a partir do último valor de sqlite_sequence
+    cur.execute("BEGIN IMMEDIATE")
     cur.execute("""
-        INSERT INTO Tarefas 
-        (Titulo, Descricao_tarefa, Data_de_criacao, Prazo_de_conclusao, Tempo_estimado, fk_prioridade, fk_status, fk_usuario)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        data["Titulo"],
-        data["Descricao_tarefa"],
-        data["Data_de_criacao"],
-        data["Prazo_de_conclusao"],
-        data["Tempo_estimado"],
-        data["fk_prioridade"],
-        data["fk_status"],
-        data["fk_usuario"]
-    ))
-    conn.commit()
-    tarefa_id = cur.lastrowid
-    conn.close()
+        SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'Tarefas'),
+                        (SELECT MAX(ID) FROM Tarefas), 0)
+    """)
+    ultimo_id = cur.fetchone()[0]
+    cur.executemany(SQL_INSERIR_TAREFA, (valores_tarefa(item) for _, item, _ in validos))
+    novos_ids = list(range(ultimo_id + 1, ultimo_id + 1 + len(validos)))
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Tarefas'")
+    if cur.fetchone()[0] != novos_ids[-1]:
+        conn.rollback()
+        return jsonify({"error": "Não foi possível determinar os IDs do lote"}), 500
 
-    return jsonify({"id": tarefa_id, "message": "Tarefa criada com sucesso"}), 201
+    relacoes = [(tarefa_id, categoria)
+                for tarefa_id, (_, _, categorias) in zip(novos_ids, validos)
+                for categoria in categorias]
+    if relacoes:
+        cur.executemany("INSERT INTO categoria_tarefa (fk_tarefa, fk_categoria) VALUES (?, ?)", relacoes)
+    confirmar(conn, evento_json("tarefas_criadas", ids=novos_ids))
+
+    ids = [None] * len(itens)
+    for tarefa_id, (indice, _, _) in zip(novos_ids, validos):
+        ids[indice] = tarefa_id
+    return jsonify({"ids": ids, "erros": erros, "message": f"{len(novos_ids)} tarefas criadas"}), 201
 
 @app.route('/tarefas/<int:tarefa_id>', methods=['DELETE'])
 def delete_tarefa(tarefa_id):
@@ -405,23 +1141,554 @@ def delete_tarefa(tarefa_id):
             error:
               type: string
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
+    def remover(conn):
+        # Verifica se a tarefa existe e a deleta na mesma transação
+        row = conn.execute("SELECT fk_status FROM Tarefas WHERE ID = ?", (tarefa_id,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM Tarefas WHERE ID = ?", (tarefa_id,))
+        return row
 
-    # Verifica se a tarefa existe
-    cur.execute("SELECT * FROM Tarefas WHERE ID = ?", (tarefa_id,))
-    row = cur.fetchone()
+    row = escrever(remover, lambda row: row and evento_json("tarefa_removida", id=tarefa_id, fk_status=row["fk_status"]))
     if not row:
-        conn.close()
         return jsonify({"error": "Tarefa não encontrada"}), 404
 
-    # Deleta a tarefa
-    cur.execute("DELETE FROM Tarefas WHERE ID = ?", (tarefa_id,))
-    conn.commit()
-    conn.close()
-
     return jsonify({"message": f"Tarefa {tarefa_id} deletada com sucesso"}), 200
 
+# -------------------------------
+# GET /tarefas/eventos  (Server-Sent Events)
+# -------------------------------
+def gerar_eventos(assinatura):
+    # Cada conexão ocupa uma thread do worker: depois de EVENTOS_DURACAO_MAX o stream é
+    # encerrado e o EventSource reconecta sozinho, retomando pelo Last-Event-ID
+    fim = time.monotonic() + EVENTOS_DURACAO_MAX
+    try:
+        yield f"retry: {EVENTOS_RETRY_MS}\n\n"
+        if assinatura.gap:
+            # Eventos perdidos (fora do histórico): o cliente recarrega o board e segue daqui
+            yield format_sse([(assinatura.start_id, "reset", "{}")])
+        while time.monotonic() < fim:
+            eventos = assinatura.get(min(EVENTOS_HEARTBEAT, max(0.0, fim - time.monotonic())))
+            if eventos:
+                yield format_sse(eventos)
+            elif assinatura.overflowed:
+                # Cliente lento: a assinatura foi descartada; ele reconecta do último id recebido
+                return
+            else:
+                yield ": ping\n\n"
+    finally:
+        assinatura.close()
+
+@app.route('/tarefas/eventos', methods=['GET'])
+def eventos_tarefas():
+    """
+    Feed de alterações das tarefas (Server-Sent Events)
+    ---
+    tags:
+      - Tarefas
+    produces:
+      - text/event-stream
+    parameters:
+      - name: Last-Event-ID
+        in: header
+        type: integer
+        required: false
+        description: Último id recebido; os eventos seguintes são reenviados (o EventSource envia sozinho ao reconectar)
+      - name: last_event_id
+        in: query
+        type: integer
+        required: false
+        description: Alternativa ao cabeçalho Last-Event-ID
+      - name: access_token
+        in: query
+        type: string
+        required: false
+        description: Token de sessão, para clientes que não enviam o cabeçalho Authorization (EventSource)
+    responses:
+      200:
+        description: "Stream de eventos tarefa_criada, tarefa_removida, status_alterado, categoria_adicionada, tarefas_criadas e tarefas_alteradas, com dados JSON compactos. reset indica eventos perdidos: recarregue o board. Comentários ': ping' mantêm a conexão viva"
+      503:
+        description: Limite de conexões do feed atingido
+    """
+    valor = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    last_event_id = _inteiro(valor, "Last-Event-ID") if valor else None
+    if event_log is not None:
+        event_log.start()
+    try:
+        assinatura = broadcaster.subscribe(last_event_id)
+    except TooManySubscribers:
+        response = jsonify({"error": "Limite de conexões do feed de eventos atingido"})
+        response.headers["Retry-After"] = str(EVENTOS_RETRY_MS // 1000)
+        return response, 503
+    response = Response(gerar_eventos(assinatura), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Evita que proxies (nginx) segurem os eventos em buffer
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# -------------------------------
+# GET /tarefas/sync  (sincronização incremental)
+# -------------------------------
+def ler_token_sync(valor):
+    # Token "<instância do banco>.<seq_alteracao>"; None se for de outro banco
+    if not valor:
+        return 0
+    instancia, _, seq = valor.rpartition(".")
+    if instancia != INSTANCIA_BANCO:
+        return None
+    return _inteiro(seq, "since")
+
+@app.route('/tarefas/sync', methods=['GET'])
+def sincronizar_tarefas():
+    """
+    Tarefas criadas, alteradas ou removidas desde um token de sincronização
+    ---
+    tags:
+      - Tarefas
+    parameters:
+      - name: since
+        in: query
+        type: string
+        required: false
+        description: Token devolvido pela chamada anterior; sem ele a resposta começa do zero (carga completa, em páginas)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Máximo de alterações por resposta (1 a 500, padrão 500)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas separadas por vírgula (ex. ID,Titulo,fk_status). ID é sempre incluído
+    responses:
+      200:
+        description: "Alterações em ordem de sequência. Aplique tarefas (upsert por ID) e removidas, guarde token e repita enquanto tem_mais for true"
+        schema:
+          type: object
+          properties:
+            tarefas:
+              type: array
+              items:
+                type: object
+            removidas:
+              type: array
+              items:
+                type: integer
+            token:
+              type: string
+            tem_mais:
+              type: boolean
+      400:
+        description: Parâmetros inválidos
+      410:
+        description: Token de outro banco ou posterior ao estado atual; sincronize do início (sem since)
+    """
+    since = ler_token_sync(request.args.get("since"))
+    colunas = ler_campos()
+    limite = _inteiro(request.args.get("limit", LIMITE_MAXIMO), "limit")
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ParametroInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+
+    conn = data_base_connection()
+    atual = conn.execute("SELECT versao FROM tabela_versao WHERE tabela = 'Tarefas_seq'").fetchone()[0]
+    if since is None or since > atual:
+        return jsonify({"error": "Token de sincronização inválido para este banco; sincronize do início"}), 410
+
+    # Os dois índices de seq_alteracao entregam as linhas já ordenadas: o SQLite intercala (MERGE)
+    # e para no limite, então o custo acompanha a quantidade de alterações, não o tamanho do board
+    cur = cursor_tuplas(conn)
+    cur.execute(f"""
+        SELECT seq_alteracao, ID, {json_object_sql(colunas)} FROM Tarefas WHERE seq_alteracao > ?
+        UNION ALL
+        SELECT seq_alteracao, ID, NULL FROM Tarefas_removidas WHERE seq_alteracao > ?
+        ORDER BY 1 LIMIT ?
+    """, (since, since, limite + 1))
+    rows = cur.fetchall()
+    tem_mais = len(rows) > limite
+    rows = rows[:limite]
+    ultimo = rows[-1][0] if rows else since
+    return app.json.compose_response({
+        "tarefas": json_array(tarefa for _, _, tarefa in rows if tarefa is not None),
+        "removidas": [tarefa_id for _, tarefa_id, tarefa in rows if tarefa is None],
+        "token": f"{INSTANCIA_BANCO}.{ultimo}",
+        "tem_mais": tem_mais,
+    })
+
+# -------------------------------
+# GET /tarefas/busca  (texto completo)
+# -------------------------------
+def montar_consulta_fts(texto):
+    # Cada palavra vira um termo entre aspas com prefixo: evita erros de sintaxe do FTS5
+    # e permite busca incremental ("impl" encontra "implementar")
+    termos = re.findall(r"\w+", texto)
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+# Caracteres escapados no texto dos trechos antes de inserir as marcações <mark>
+ESCAPE_HTML = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#39;"))
+
+def trecho_sql(coluna, tokens):
+    # snippet() marca os termos com os controles \x02/\x03; o texto é escapado como HTML e
+    # só depois os marcadores viram <mark>, então conteúdo da tarefa nunca vira markup
+    expr = f"snippet(Tarefas_fts, {coluna}, char(2), char(3), '…', {tokens})"
+    for caractere, entidade in ESCAPE_HTML:
+        expr = f"replace({expr}, '{caractere.replace(chr(39), chr(39) * 2)}', '{entidade}')"
+    return f"replace(replace({expr}, char(2), '<mark>'), char(3), '</mark>')"
+
+@app.route('/tarefas/busca', methods=['GET'])
+def buscar_tarefas():
+    """
+    Busca tarefas por texto no título e na descrição, ordenadas por relevância (bm25)
+    ---
+    tags:
+      - Tarefas
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Texto a buscar; cada palavra também casa como prefixo
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_status (aceita lista separada por vírgula)
+      - name: usuario
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_usuario (aceita lista separada por vírgula)
+      - name: prioridade
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_prioridade (aceita lista separada por vírgula)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (1 a 500, padrão 100)
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Posição inicial na lista de resultados (use o next_offset da página anterior)
+    responses:
+      200:
+        description: Tarefas encontradas, mais relevantes primeiro, com trechos em HTML escapado destacados por <mark>
+        schema:
+          type: object
+          properties:
+            tarefas:
+              type: array
+              items:
+                type: object
+                properties:
+                  ID:
+                    type: integer
+                  Titulo:
+                    type: string
+                  trecho_titulo:
+                    type: string
+                  trecho_descricao:
+                    type: string
+                  relevancia:
+                    type: number
+            next_offset:
+              type: integer
+      400:
+        description: Parâmetro q ausente ou inválido
+    """
+    consulta = montar_consulta_fts(request.args.get("q", ""))
+    if not consulta:
+        raise ParametroInvalido("Informe o texto da busca em q")
+    limite = _inteiro(request.args.get("limit", LIMITE_PADRAO), "limit")
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ParametroInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    offset = _inteiro(request.args.get("offset", 0), "offset")
+    if offset < 0:
+        raise ParametroInvalido("offset deve ser maior ou igual a 0")
+
+    where, params = montar_where_tarefas(ler_filtros())
+    # bm25 com peso maior para o título; valores menores são mais relevantes.
+    # A página é escolhida na subconsulta; a externa só serializa cada linha com json_object.
+    campos = ("ID", "Titulo", "fk_status", "fk_usuario", "fk_prioridade",
+              "trecho_titulo", "trecho_descricao", "relevancia")
+    sql = f"""
+        SELECT {json_object_sql(campos)} FROM (
+            SELECT Tarefas.ID, Tarefas.Titulo, Tarefas.fk_status, Tarefas.fk_usuario, Tarefas.fk_prioridade,
+                   {trecho_sql(0, 8)} AS trecho_titulo,
+                   {trecho_sql(1, 16)} AS trecho_descricao,
+                   bm25(Tarefas_fts, 10.0, 1.0) AS relevancia
+            FROM Tarefas_fts
+            JOIN Tarefas ON Tarefas.ID = Tarefas_fts.rowid
+            WHERE Tarefas_fts MATCH ? {''.join(' AND ' + w for w in where)}
+            ORDER BY relevancia, Tarefas.ID
+            LIMIT ? OFFSET ?
+        )
+        ORDER BY relevancia, ID
+    """
+    cur = cursor_tuplas(data_base_connection())
+    cur.execute(sql, [consulta] + params + [limite + 1, offset])
+    tarefas = [tarefa for (tarefa,) in cur.fetchall()]
+    next_offset = None
+    if len(tarefas) > limite:
+        tarefas = tarefas[:limite]
+        next_offset = offset + limite
+    return app.json.compose_response({"tarefas": json_array(tarefas), "next_offset": next_offset})
+
+@app.cli.command('reindexar-busca')
+def reindexar_busca():
+    """Reconstrói o índice de texto completo (Tarefas_fts) a partir de Tarefas."""
+    conn = pool.acquire()
+    try:
+        conn.execute("INSERT INTO Tarefas_fts (Tarefas_fts) VALUES ('rebuild')")
+        conn.commit()
+        total = conn.execute("SELECT COUNT(*) FROM Tarefas").fetchone()[0]
+    finally:
+        pool.release(conn)
+    print(f"Índice de busca reconstruído ({total} tarefas)")
+
+# -------------------------------
+# GET /board  (quadro Kanban completo)
+# -------------------------------
+LIMITE_PADRAO_COLUNA = 50
+
+@app.route('/board', methods=['GET'])
+def get_board():
+    """
+    Quadro Kanban: todos os status com suas tarefas agrupadas em uma única requisição
+    ---
+    tags:
+      - Tarefas
+    parameters:
+      - name: usuario
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_usuario (aceita lista separada por vírgula)
+      - name: prioridade
+        in: query
+        type: string
+        required: false
+        description: Filtra por fk_prioridade (aceita lista separada por vírgula)
+      - name: categoria
+        in: query
+        type: string
+        required: false
+        description: Apenas tarefas com alguma das categorias informadas (lista separada por vírgula)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas das tarefas separadas por vírgula. ID e fk_status são sempre incluídos
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Máximo de tarefas por coluna (1 a 500, padrão 50)
+    responses:
+      200:
+        description: Colunas do quadro na ordem dos status
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              ID:
+                type: integer
+                description: ID do status
+              Nome_status:
+                type: string
+              total:
+                type: integer
+                description: Quantidade de tarefas na coluna (considerando os filtros)
+              tarefas:
+                type: array
+                items:
+                  type: object
+    """
+    filtros = ler_filtros()
+    categorias = _inteiros(request.args, "categoria")
+    colunas = ler_campos(obrigatorias=("ID", "fk_status"))
+    limite = _inteiro(request.args.get("limit", LIMITE_PADRAO_COLUNA), "limit")
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ParametroInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+
+    # Uma passada ordenada por (fk_status, ID), que o índice de fk_status atende;
+    # as funções de janela numeram as tarefas de cada coluna e contam o total.
+    where, params = montar_where_tarefas(filtros, categorias)
+    sql = f"""
+        SELECT fk_status, total_coluna, {json_object_sql(colunas)} FROM (
+            SELECT {', '.join(colunas)},
+                   ROW_NUMBER() OVER (PARTITION BY fk_status ORDER BY ID) AS posicao,
+                   COUNT(*) OVER (PARTITION BY fk_status) AS total_coluna
+            FROM Tarefas
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+        )
+        WHERE posicao <= ?
+        ORDER BY fk_status, ID
+    """
+    conn = data_base_connection()
+    cur = cursor_tuplas(conn)
+    cur.execute(sql, params + [limite])
+
+    board = {}
+    for status in lookup_cache.rows(conn, "Status"):
+        board[status["ID"]] = {"ID": status["ID"], "Nome_status": status["Nome_status"], "total": 0, "tarefas": []}
+    # Cada linha traz (fk_status, total da coluna, tarefa já serializada pelo SQLite)
+    for status_id, total, tarefa in cur.fetchall():
+        coluna = board.setdefault(status_id, {"ID": status_id, "Nome_status": None, "total": 0, "tarefas": []})
+        coluna["total"] = total
+        coluna["tarefas"].append(RawJSON(tarefa))
+
+    # Se a query filtrar status, só essas colunas são retornadas
+    if "fk_status" in filtros:
+        board = {k: v for k, v in board.items() if k in filtros["fk_status"]}
+    return app.json.compose_response(list(board.values()))
+
+# -------------------------------
+# GET /tarefas/estatisticas  (contagens mantidas por gatilhos)
+# -------------------------------
+# IDs de status que não contam como atrasados; padrão: status chamados "feito"
+STATUS_CONCLUIDOS = [int(s) for s in os.environ.get('STATUS_CONCLUIDOS', '').split(',') if s.strip()]
+NOMES_DIMENSAO = {"status": ("Status", "Nome_status"), "usuario": ("Usuario", "Nome_usuario"),
+                  "prioridade": ("Prioridade", "Nome_prioridade")}
+
+def status_concluidos(conn):
+    if STATUS_CONCLUIDOS:
+        return STATUS_CONCLUIDOS
+    return [s["ID"] for s in lookup_cache.rows(conn, "Status") if (s["Nome_status"] or "").strip().lower() == "feito"]
+
+@app.route('/tarefas/estatisticas', methods=['GET'])
+def get_estatisticas():
+    """
+    Contagens de tarefas por status, usuário e prioridade, e tarefas atrasadas por status
+    ---
+    tags:
+      - Tarefas
+    description: >
+      Lê as tabelas Tarefas_contagem e Tarefas_prazo_status, mantidas por gatilhos a cada
+      escrita em Tarefas: o custo depende do número de grupos, não do número de tarefas.
+      Valores sem status/usuário/prioridade aparecem com ID nulo. Atrasadas são as tarefas com
+      prazo anterior a hoje em status não concluídos (STATUS_CONCLUIDOS, padrão "feito").
+    responses:
+      200:
+        description: Contagens obtidas com sucesso
+        schema:
+          type: object
+          properties:
+            total:
+              type: integer
+            por_status:
+              type: array
+              items:
+                type: object
+                properties:
+                  ID:
+                    type: integer
+                  Nome_status:
+                    type: string
+                  total:
+                    type: integer
+            por_usuario:
+              type: array
+              items:
+                type: object
+                properties:
+                  ID:
+                    type: integer
+                  Nome_usuario:
+                    type: string
+                  total:
+                    type: integer
+            por_prioridade:
+              type: array
+              items:
+                type: object
+                properties:
+                  ID:
+                    type: integer
+                  Nome_prioridade:
+                    type: string
+                  total:
+                    type: integer
+            atrasadas:
+              type: object
+              properties:
+                total:
+                  type: integer
+                data_referencia:
+                  type: string
+                  description: Data (AAAA-MM-DD) usada como hoje
+                por_status:
+                  type: array
+                  items:
+                    type: object
+      500:
+        description: Erro interno no servidor
+    """
+    conn = data_base_connection()
+    cur = cursor_tuplas(conn)
+    # Mesma transação de leitura para as duas tabelas: totais coerentes entre si
+    conn.execute("BEGIN")
+    try:
+        cur.execute("SELECT dimensao, valor, total FROM Tarefas_contagem WHERE total > 0 ORDER BY dimensao, valor")
+        contagens = cur.fetchall()
+        concluidos = status_concluidos(conn)
+        cur.execute(f"""
+            SELECT fk_status, SUM(total), date('now', 'localtime') FROM Tarefas_prazo_status
+            WHERE prazo != '' AND prazo < date('now', 'localtime') AND total > 0
+              AND fk_status NOT IN ({','.join('?' * len(concluidos))})
+            GROUP BY fk_status ORDER BY fk_status
+        """, concluidos)
+        atrasos = cur.fetchall()
+        hoje = atrasos[0][2] if atrasos else conn.execute("SELECT date('now', 'localtime')").fetchone()[0]
+    finally:
+        conn.rollback()
+
+    def grupo(dimensao, valor, total):
+        tabela, coluna = NOMES_DIMENSAO[dimensao]
+        return {"ID": valor or None, coluna: lookup_cache.nome(conn, tabela, valor, coluna), "total": total}
+
+    resultado = {f"por_{d}": [] for d in DIMENSOES}
+    for dimensao, valor, total in contagens:
+        resultado[f"por_{dimensao}"].append(grupo(dimensao, valor, total))
+    atrasadas = [grupo("status", status_id, total) for status_id, total, _ in atrasos]
+    return jsonify({
+        "total": sum(g["total"] for g in resultado["por_status"]),
+        **resultado,
+        "atrasadas": {"total": sum(g["total"] for g in atrasadas), "data_referencia": hoje, "por_status": atrasadas},
+    }), 200
+
+@app.cli.command('verificar-contagens')
+def verificar_contagens():
+    """Compara as contagens de /tarefas/estatisticas com as calculadas a partir de Tarefas."""
+    conn = pool.acquire()
+    try:
+        conn.execute("BEGIN")
+        encontradas = divergencias(conn)
+        conn.rollback()
+    finally:
+        pool.release(conn)
+    for tabela, grupo, mantida, esperada in encontradas:
+        print(f"{tabela} {grupo}: mantida {mantida}, esperada {esperada}")
+    if encontradas:
+        print(f"{len(encontradas)} contagens divergentes; use 'flask reconstruir-contagens'")
+        raise SystemExit(1)
+    print("Contagens consistentes")
+
+@app.cli.command('reconstruir-contagens')
+def reconstruir_contagens():
+    """Recalcula as tabelas de contagem (Tarefas_contagem, Tarefas_prazo_status) a partir de Tarefas."""
+    conn = pool.acquire()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        reconstruir(conn)
+        conn.commit()
+    finally:
+        pool.release(conn)
+    print("Contagens reconstruídas")
+
 # -------------------------------
 # GET /prioridades
 # -------------------------------
@@ -447,13 +1714,7 @@ def get_prioridades():
                 type: string
                 description: Nome da prioridade
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM Prioridade")
-    rows = cur.fetchall()
-    conn.close()
-
-    prioridades = [dict(r) for r in rows]
+    prioridades = lookup_cache.rows(data_base_connection(), "Prioridade")
     return jsonify(prioridades), 200
 
 
@@ -482,14 +1743,107 @@ def get_status():
                 type: string
                 description: Nome do status
     """
+    status_list = lookup_cache.rows(data_base_connection(), "Status")
+    return jsonify(status_list), 200
+
+SQL_DETALHE_TAREFA = """
+    SELECT t.ID, t.Titulo, t.Descricao_tarefa,
+           {data_criacao} AS Data_de_criacao, {prazo} AS Prazo_de_conclusao, t.Tempo_estimado,
+           p.Nome_prioridade, s.Nome_status, u.Nome_usuario
+    FROM Tarefas t
+    LEFT JOIN Prioridade p ON p.ID = t.fk_prioridade
+    LEFT JOIN Status s ON s.ID = t.fk_status
+    LEFT JOIN Usuario u ON u.ID = t.fk_usuario
+""".format(data_criacao=data_br_sql("t.Data_de_criacao"), prazo=data_br_sql("t.Prazo_de_conclusao"))
+
+def montar_detalhe_tarefa(row):
+    return {
+        "id": row["ID"],
+        "Titulo": row["Titulo"],
+        "Descricao_tarefa": row["Descricao_tarefa"],
+        "Data_de_criacao": row["Data_de_criacao"],
+        "Prazo_de_conclusao": row["Prazo_de_conclusao"],
+        "Tempo_estimado": row["Tempo_estimado"],
+        "prioridade": row["Nome_prioridade"],
+        "status": row["Nome_status"],
+        "usuario": row["Nome_usuario"]
+    }
+
+@app.route('/tarefas/detalhes', methods=['GET'])
+def get_tarefas_detalhes():
+    """
+    Busca várias tarefas de uma vez, com nomes, datas formatadas e categorias
+    ---
+    tags:
+      - Tarefas
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: true
+        description: IDs das tarefas separados por vírgula (até 500), ex. 1,2,3
+    responses:
+      200:
+        description: Detalhes das tarefas encontradas, na ordem dos IDs informados
+        schema:
+          type: object
+          properties:
+            tarefas:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  Titulo:
+                    type: string
+                  prioridade:
+                    type: string
+                  status:
+                    type: string
+                  usuario:
+                    type: string
+                  categorias:
+                    type: array
+                    items:
+                      type: object
+            nao_encontradas:
+              type: array
+              items:
+                type: integer
+      400:
+        description: Parâmetro ids ausente ou inválido
+    """
+    if not request.args.get("ids"):
+        raise ParametroInvalido("Informe ids")
+    ids = list(dict.fromkeys(_inteiro(v, "ids") for v in request.args["ids"].split(",") if v.strip()))
+    if len(ids) > LIMITE_MAXIMO:
+        raise ParametroInvalido(f"Máximo de {LIMITE_MAXIMO} ids por requisição")
+
+    # Duas consultas no total, independente da quantidade de ids
+    marcadores = ", ".join("?" * len(ids))
     conn = data_base_connection()
     cur = conn.cursor()
-    cur.execute("SELECT * FROM Status")
-    rows = cur.fetchall()
-    conn.close()
+    cur.execute(SQL_DETALHE_TAREFA + f" WHERE t.ID IN ({marcadores})", ids)
+    detalhes = {row["ID"]: montar_detalhe_tarefa(row) for row in cur.fetchall()}
+    for detalhe in detalhes.values():
+        detalhe["categorias"] = []
 
-    status_list = [dict(r) for r in rows]
-    return jsonify(status_list), 200
+    encontradas = list(detalhes)
+    if encontradas:
+        cur.execute(f"""
+            SELECT ct.fk_tarefa, c.ID, c.Nome_categoria
+            FROM categoria_tarefa ct
+            JOIN Categoria c ON c.ID = ct.fk_categoria
+            WHERE ct.fk_tarefa IN ({', '.join('?' * len(encontradas))})
+        """, encontradas)
+        for row in cur.fetchall():
+            detalhes[row["fk_tarefa"]]["categorias"].append({"ID": row["ID"], "Nome_categoria": row["Nome_categoria"]})
+
+    return jsonify({
+        "tarefas": [detalhes[i] for i in ids if i in detalhes],
+        "nao_encontradas": [i for i in ids if i not in detalhes]
+    }), 200
 
 @app.route('/tarefas/<int:tarefa_id>', methods=['GET'])
 def get_tarefa_por_id(tarefa_id):
@@ -532,49 +1886,13 @@ def get_tarefa_por_id(tarefa_id):
     """
     conn = data_base_connection()
     cur = conn.cursor()
-    cur.execute('SELECT * FROM Tarefas WHERE ID = ?', (tarefa_id,))
+    # Uma única consulta resolve a tarefa e os nomes de prioridade, status e usuário
+    cur.execute(SQL_DETALHE_TAREFA + " WHERE t.ID = ?", (tarefa_id,))
     tarefa = cur.fetchone()
     if not tarefa:
-        conn.close()
         return jsonify({"error": "Tarefa não encontrada"}), 404
 
-    tarefa_dict = dict(tarefa)
-
-    # Buscar nome da prioridade
-    prioridade_nome = None
-    if tarefa_dict.get("fk_prioridade"):
-        cur.execute('SELECT Nome_prioridade FROM Prioridade WHERE ID = ?', (tarefa_dict["fk_prioridade"],))
-        row = cur.fetchone()
-        prioridade_nome = row["Nome_prioridade"] if row else None
-
-    # Buscar nome do status
-    status_nome = None
-    if tarefa_dict.get("fk_status"):
-        cur.execute('SELECT Nome_status FROM Status WHERE ID = ?', (tarefa_dict["fk_status"],))
-        row = cur.fetchone()
-        status_nome = row["Nome_status"] if row else None
-
-    # Buscar nome do usuário
-    usuario_nome = None
-    if tarefa_dict.get("fk_usuario"):
-        cur.execute('SELECT Nome_usuario FROM Usuario WHERE ID = ?', (tarefa_dict["fk_usuario"],))
-        row = cur.fetchone()
-        usuario_nome = row["Nome_usuario"] if row else None
-
-    conn.close()
-
-    # Montar resposta
-    resposta = {
-        "id": tarefa_dict.get("ID"),
-        "Titulo": tarefa_dict.get("Titulo"),
-        "Descricao_tarefa": tarefa_dict.get("Descricao_tarefa"),
-        "Data_de_criacao": format_date_br(tarefa_dict.get("Data_de_criacao")),
-        "Prazo_de_conclusao": format_date_br(tarefa_dict.get("Prazo_de_conclusao")),
-        "Tempo_estimado": tarefa_dict.get("Tempo_estimado"),
-        "prioridade": prioridade_nome,
-        "status": status_nome,
-        "usuario": usuario_nome
-    }
+    resposta = montar_detalhe_tarefa(tarefa)
     return jsonify(resposta), 200
 
 @app.route('/tarefas/<int:tarefa_id>/status', methods=['PUT'])
@@ -622,19 +1940,145 @@ def update_tarefa_status(tarefa_id):
     if status_id is None:
         return jsonify({"error": "Campo status_id obrigatório"}), 400
 
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM Tarefas WHERE ID = ?", (tarefa_id,))
-    tarefa = cur.fetchone()
+    def atualizar(conn):
+        tarefa = conn.execute("SELECT fk_status FROM Tarefas WHERE ID = ?", (tarefa_id,)).fetchone()
+        if tarefa is not None:
+            conn.execute("UPDATE Tarefas SET fk_status = ? WHERE ID = ?", (status_id, tarefa_id))
+        return tarefa
+
+    tarefa = escrever(atualizar, lambda tarefa: tarefa and evento_json(
+        "status_alterado", id=tarefa_id, de=tarefa["fk_status"], para=status_id))
     if not tarefa:
-        conn.close()
         return jsonify({"error": "Tarefa não encontrada"}), 404
-
-    cur.execute("UPDATE Tarefas SET fk_status = ? WHERE ID = ?", (status_id, tarefa_id))
-    conn.commit()
-    conn.close()
     return jsonify({"id": tarefa_id, "fk_status": status_id, "message": "Status atualizado com sucesso"}), 200
 
+def _eh_inteiro(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+def _lista_inteiros(valor):
+    valores = valor if isinstance(valor, list) else [valor]
+    if not valores or not all(_eh_inteiro(v) for v in valores):
+        return None
+    return valores
+
+@app.route('/tarefas/status', methods=['PUT'])
+def update_tarefas_status_lote():
+    """
+    Atualiza o status de várias tarefas em uma única transação
+    ---
+    tags:
+      - Tarefas
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: movimentos
+        required: true
+        description: 'Lista de pares {tarefa_id, status_id} (ou {"movimentos": [...]}), ou um filtro com o status de destino, ex. {"filtro": {"status": 1, "usuario": 8}, "status_id": 3}'
+        schema:
+          type: object
+          properties:
+            movimentos:
+              type: array
+              items:
+                type: object
+                properties:
+                  tarefa_id:
+                    type: integer
+                  status_id:
+                    type: integer
+            filtro:
+              type: object
+              description: Mesmos filtros de GET /tarefas (status, usuario, prioridade), valor ou lista
+            status_id:
+              type: integer
+              description: Status de destino quando filtro é usado
+    responses:
+      200:
+        description: Status atualizados
+        schema:
+          type: object
+          properties:
+            atualizadas:
+              type: array
+              items:
+                type: integer
+            nao_encontradas:
+              type: array
+              items:
+                type: integer
+            total:
+              type: integer
+            message:
+              type: string
+      400:
+        description: Dados inválidos
+    """
+    data = request.get_json(silent=True)
+    conn = data_base_connection()
+    cur = conn.cursor()
+
+    if isinstance(data, dict) and "filtro" in data:
+        filtro = data.get("filtro")
+        status_id = data.get("status_id")
+        if not isinstance(filtro, dict) or not _eh_inteiro(status_id):
+            return jsonify({"error": "filtro (objeto) e status_id obrigatórios"}), 400
+        filtros = {}
+        for nome, valor in filtro.items():
+            valores = _lista_inteiros(valor)
+            if nome not in FILTROS_TAREFA or valores is None:
+                return jsonify({"error": f"Filtro inválido: {nome}"}), 400
+            filtros[FILTROS_TAREFA[nome]] = valores
+        if not filtros:
+            return jsonify({"error": "Informe ao menos um filtro"}), 400
+        where, params = montar_where_tarefas(filtros)
+        # RETURNING devolve os IDs na mesma transação: o evento e a resposta dizem quais cards mudaram
+        cur.execute(f"UPDATE Tarefas SET fk_status = ? WHERE {' AND '.join(where)} RETURNING ID",
+                    [status_id] + params)
+        atualizadas = sorted(row["ID"] for row in cur.fetchall())
+        confirmar(conn, atualizadas and evento_json(
+            "tarefas_alteradas", movimentos={str(i): status_id for i in atualizadas}))
+        return jsonify({
+            "atualizadas": atualizadas,
+            "total": len(atualizadas),
+            "fk_status": status_id,
+            "message": "Status atualizados com sucesso"
+        }), 200
+
+    movimentos = data.get("movimentos") if isinstance(data, dict) else data
+    if not isinstance(movimentos, list) or not movimentos:
+        return jsonify({"error": "Envie uma lista de {tarefa_id, status_id} ou um filtro"}), 400
+    if len(movimentos) > LIMITE_LOTE:
+        return jsonify({"error": f"Máximo de {LIMITE_LOTE} movimentos por requisição"}), 400
+
+    # Se a mesma tarefa aparecer mais de uma vez, vale o último movimento
+    destino = {}
+    for mov in movimentos:
+        if not isinstance(mov, dict) or not _eh_inteiro(mov.get("tarefa_id")) or not _eh_inteiro(mov.get("status_id")):
+            return jsonify({"error": "Cada movimento precisa de tarefa_id e status_id inteiros"}), 400
+        destino[mov["tarefa_id"]] = mov["status_id"]
+
+    ids = list(destino)
+    cur.execute("BEGIN IMMEDIATE")
+    cur.execute(f"SELECT ID FROM Tarefas WHERE ID IN ({', '.join('?' * len(ids))})", ids)
+    existentes = {row["ID"] for row in cur.fetchall()}
+
+    # Um UPDATE ... WHERE ID IN (...) por status de destino
+    grupos = {}
+    for tarefa_id in ids:
+        if tarefa_id in existentes:
+            grupos.setdefault(destino[tarefa_id], []).append(tarefa_id)
+    for status_id, grupo in grupos.items():
+        cur.execute(f"UPDATE Tarefas SET fk_status = ? WHERE ID IN ({', '.join('?' * len(grupo))})", [status_id] + grupo)
+    confirmar(conn, grupos and evento_json(
+        "tarefas_alteradas", movimentos={str(i): destino[i] for i in ids if i in existentes}))
+
+    return jsonify({
+        "atualizadas": [i for i in ids if i in existentes],
+        "nao_encontradas": [i for i in ids if i not in existentes],
+        "message": "Status atualizados com sucesso"
+    }), 200
+
 @app.route('/categoria_tarefa', methods=['POST'])
 def add_categoria_tarefa():
     """
@@ -673,11 +2117,10 @@ def add_categoria_tarefa():
     if not fk_tarefa or not fk_categoria:
         return jsonify({"error": "fk_tarefa e fk_categoria obrigatórios"}), 400
 
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO categoria_tarefa (fk_tarefa, fk_categoria) VALUES (?, ?)", (fk_tarefa, fk_categoria))
-    conn.commit()
-    conn.close()
+    escrever(
+        lambda conn: conn.execute(
+            "INSERT INTO categoria_tarefa (fk_tarefa, fk_categoria) VALUES (?, ?)", (fk_tarefa, fk_categoria)).rowcount,
+        lambda _: evento_json("categoria_adicionada", fk_tarefa=fk_tarefa, fk_categoria=fk_categoria))
     return jsonify({"message": "Relação categoria-tarefa criada"}), 201
 
 @app.route('/tarefas/<int:tarefa_id>/categorias', methods=['GET'])
@@ -706,18 +2149,14 @@ def get_categorias_da_tarefa(tarefa_id):
               Nome_categoria:
                 type: string
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT c.ID, c.Nome_categoria
+    cur = cursor_tuplas(data_base_connection())
+    cur.execute(f"""
+        SELECT {json_object_sql([("ID", "c.ID"), ("Nome_categoria", "c.Nome_categoria")])}
         FROM Categoria c
         JOIN categoria_tarefa ct ON ct.fk_categoria = c.ID
         WHERE ct.fk_tarefa = ?
     """, (tarefa_id,))
-    rows = cur.fetchall()
-    conn.close()
-    categorias = [dict(r) for r in rows]
-    return jsonify(categorias), 200
+    return app.json.compose_response(json_array(categoria for (categoria,) in cur.fetchall()))
 
 @app.route('/tarefas/usuario/<int:usuario_id>', methods=['GET'])
 def get_tarefas_por_usuario(usuario_id):
@@ -732,21 +2171,51 @@ def get_tarefas_por_usuario(usuario_id):
         type: integer
         required: true
         description: ID do usuário para filtrar as tarefas
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Filtra também por fk_status (aceita lista separada por vírgula)
+      - name: prioridade
+        in: query
+        type: string
+        required: false
+        description: Filtra também por fk_prioridade (aceita lista separada por vírgula)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas separadas por vírgula (ex. ID,Titulo,fk_status). ID é sempre incluído
+      - name: cursor
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas tarefas com ID maior que o cursor (use o next_cursor da página anterior)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (1 a 500). Com limit ou cursor a resposta vem paginada
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: Envia o array JSON em streaming (memória constante no servidor)
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson]
+        required: false
+        description: NDJSON em streaming, uma tarefa por linha (equivale a Accept application/x-ndjson)
     responses:
       200:
-        description: Lista de tarefas do usuário informado
+        description: Lista de tarefas do usuário informado (ou objeto {tarefas, next_cursor} quando paginada)
         schema:
           type: array
           items:
             type: object
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM Tarefas WHERE fk_usuario = ?", (usuario_id,))
-    rows = cur.fetchall()
-    conn.close()
-    tarefas = [dict(r) for r in rows]
-    return jsonify(tarefas), 200
+    return listar_tarefas(fk_usuario=usuario_id)
 
 @app.route('/usuarios', methods=['GET'])
 def get_usuarios():
@@ -768,14 +2237,22 @@ def get_usuarios():
               Nome_usuario:
                 type: string
     """
-    conn = data_base_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT ID, Nome_usuario FROM Usuario")
-    rows = cur.fetchall()
-    conn.close()
-    usuarios = [dict(r) for r in rows]
+    usuarios = lookup_cache.rows(data_base_connection(), "Usuario")
     return jsonify(usuarios), 200
 
+# Cliente da API de clima: cache TTL + stale-while-revalidate, coalescência e circuit breaker
+clima_client = ClimaClient(
+    os.environ.get('CLIMA_API_URL', "https://api.open-meteo.com/v1/forecast"),
+    params={
+        "latitude": -23.533773,
+        "longitude": -46.625290,
+        "current": "temperature_2m,relative_humidity_2m,rain,weather_code"
+    },
+    ttl=float(os.environ.get('CLIMA_TTL', 600)),
+    stale_ttl=float(os.environ.get('CLIMA_STALE_TTL', 3600)),
+    timeout=float(os.environ.get('CLIMA_TIMEOUT', 10)),
+)
+
 @app.route('/clima', methods=['GET'])
 def get_clima():
     """
@@ -785,7 +2262,7 @@ def get_clima():
       - Clima
     responses:
       200:
-        description: Dados climáticos obtidos com sucesso
+        description: Dados climáticos obtidos com sucesso. O header Age informa a idade (s) do valor em cache e X-Cache indica HIT, STALE ou MISS
         schema:
           type: object
           properties:
@@ -806,45 +2283,155 @@ def get_clima():
                   type: integer
       500:
         description: Erro ao obter dados climáticos
+      503:
+        description: API do clima indisponível (circuit breaker aberto); ver Retry-After
     """
     try:
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": -23.533773,
-            "longitude": -46.625290,
-            "current": "temperature_2m,relative_humidity_2m,rain,weather_code"
-        }
-        
-        print(f"Tentando acessar: {url} com parâmetros: {params}")
-        response = requests.get(url, params=params, timeout=10)
-        print(f"Status da resposta: {response.status_code}")
-        
-        response.raise_for_status()
-        data = response.json()
-        print(f"Dados recebidos: {data}")
-        return jsonify(data), 200
-        
+        data, idade, estado = clima_client.obter()
+        response = jsonify(data)
+        response.headers["Age"] = str(int(idade))
+        response.headers["X-Cache"] = estado
+        return response, 200
+
+    except CircuitOpen as e:
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = str(max(1, int(e.retry_after)))
+        return response, 503
     except requests.exceptions.Timeout as e:
         error_msg = f"Timeout ao acessar API do clima: {str(e)}"
-        print(error_msg)
+        app.logger.warning(error_msg)
         return jsonify({"error": error_msg}), 500
     except requests.exceptions.ConnectionError as e:
         error_msg = f"Erro de conexão com API do clima: {str(e)}"
-        print(error_msg)
+        app.logger.warning(error_msg)
         return jsonify({"error": error_msg}), 500
     except requests.exceptions.HTTPError as e:
         error_msg = f"Erro HTTP da API do clima: {str(e)}"
-        print(error_msg)
+        app.logger.warning(error_msg)
         return jsonify({"error": error_msg}), 500
     except requests.exceptions.RequestException as e:
         error_msg = f"Erro geral ao obter dados climáticos: {str(e)}"
-        print(error_msg)
+        app.logger.warning(error_msg)
         return jsonify({"error": error_msg}), 500
     except Exception as e:
         error_msg = f"Erro inesperado: {str(e)}"
-        print(error_msg)
+        app.logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
+@app.route('/health/clima', methods=['GET'])
+def health_clima():
+    """
+    Estado do cache e do circuit breaker da API do clima
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Contadores de cache, chamadas ao upstream e estado do circuit breaker
+    """
+    return jsonify(clima_client.stats()), 200
+
+# Métricas do pool e da API do clima lidas na hora da exportação
+ESTADOS_POOL = ("max_size", "created", "in_use", "idle")
+CONTADORES_POOL = ("checkouts", "waits", "timeouts")
+metrics.registry.callback(
+    "db_pool_connections", "Conexões do pool por estado",
+    lambda: {(estado,): valor for estado, valor in pool.stats().items() if estado in ESTADOS_POOL},
+    ("state",))
+metrics.registry.callback(
+    "db_pool_events_total", "Empréstimos, esperas e timeouts do pool",
+    lambda: {(evento,): valor for evento, valor in pool.stats().items() if evento in CONTADORES_POOL},
+    ("event",), kind="counter")
+if writer is not None:
+    metrics.registry.callback(
+        "db_writer_events_total", "Lotes, operações e falhas do escritor agrupado",
+        lambda: {(evento,): valor for evento, valor in writer.stats().items()
+                 if evento in ("batches", "operations", "failed", "cancelled", "commit_errors")},
+        ("event",), kind="counter")
+    metrics.registry.callback(
+        "db_writer_queue", "Operações aguardando o escritor", lambda: {(): writer.stats()["queued"]})
+metrics.registry.callback(
+    "eventos_conexoes", "Conexões abertas no feed /tarefas/eventos",
+    lambda: {(): broadcaster.stats()["subscribers"]})
+metrics.registry.callback(
+    "eventos_total", "Eventos publicados e assinaturas descartadas por fila cheia",
+    lambda: {(evento,): valor for evento, valor in broadcaster.stats().items() if evento in ("published", "dropped")},
+    ("event",), kind="counter")
+metrics.registry.callback(
+    "db_pool_wait_seconds_total", "Tempo total esperando conexão livre",
+    lambda: {(): pool.stats()["wait_time_s"]}, kind="counter")
+clima_latencia = metrics.registry.histogram(
+    "clima_upstream_duration_seconds", "Duração das chamadas à API do clima")
+clima_client.latency_observers.append(clima_latencia.observe)
+metrics.registry.callback(
+    "clima_events_total", "Acertos de cache, chamadas ao upstream e curto-circuitos da API do clima",
+    lambda: {(evento,): valor for evento, valor in clima_client.counters.items()},
+    ("event",), kind="counter")
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Métricas no formato texto do Prometheus (por processo)
+    ---
+    tags:
+      - Sistema
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Latência, status, bytes e SQL por endpoint; pool de conexões; API do clima
+    """
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+# O relatório expõe o SQL e os planos das consultas: só para usuários autenticados, para quem
+# envia X-Debug-Token igual a DEBUG_QUERIES_TOKEN ou para chamadas locais sem proxy na frente
+DEBUG_QUERIES_TOKEN = os.environ.get('DEBUG_QUERIES_TOKEN')
+ENDERECOS_LOCAIS = {"127.0.0.1", "::1"}
+
+def acesso_debug_permitido():
+    if g.get("usuario_id") is not None:
+        return True
+    token = request.headers.get("X-Debug-Token")
+    if DEBUG_QUERIES_TOKEN and token is not None:
+        return hmac.compare_digest(token.encode(), DEBUG_QUERIES_TOKEN.encode())
+    return request.remote_addr in ENDERECOS_LOCAIS and "X-Forwarded-For" not in request.headers
+
+@app.route('/debug/queries', methods=['GET', 'DELETE'])
+def debug_queries():
+    """
+    Relatório do perfil de consultas SQL (requer SLOW_QUERY_MS)
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: "Consultas agregadas por SQL normalizado (mais custosas primeiro) com plano, rotas e alertas (full_scan, n_plus_one); DELETE zera o relatório"
+      403:
+        description: "Acesso restrito: requer token de usuário, X-Debug-Token igual a DEBUG_QUERIES_TOKEN ou chamada local"
+      404:
+        description: Perfil de consultas desativado
+    """
+    if query_profiler is None:
+        return jsonify({"error": "Perfil de consultas desativado (defina SLOW_QUERY_MS)"}), 404
+    if not acesso_debug_permitido():
+        return jsonify({"error": "Acesso ao perfil de consultas restrito"}), 403
+    if request.method == "DELETE":
+        query_profiler.reset()
+        return jsonify({"message": "Relatório de consultas zerado"}), 200
+    return jsonify(query_profiler.report()), 200
+
+def warm_up():
+    # Aquecimento por processo (chamado pelo serve.py após o fork): abre as conexões
+    # do pool e carrega as tabelas de apoio antes da primeira requisição
+    conns = [pool.acquire() for _ in range(pool.max_size)]
+    try:
+        for tabela in lookup_cache.queries:
+            lookup_cache.rows(conns[0], tabela)
+    finally:
+        for conn in conns:
+            pool.release(conn)
+
 if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use serve.py
     # Vincula em 0.0.0.0 para aceitar conexões de qualquer interface
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
\ No newline at end of file
@@ -0,0 +1,4 @@
+# Benchmarks da API. Executar a partir de back-end/:
+#   python -m benchmark.dataset        banco sintético reprodutível (escala configurável)
+#   python -m benchmark.load           carga sobre todas as rotas, relatório JSON com p50/p95/p99
+#   python -m benchmark.serialization  microbenchmark da serialização das listagens
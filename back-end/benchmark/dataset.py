@@ -0,0 +1,150 @@
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+
+from auth import hash_senha
+from migrations import apply_migrations
+
+# Gera um banco sintético com o mesmo schema do database.db distribuído, em escala configurável
+# e reprodutível (mesma semente -> mesmos dados). As migrações da aplicação são aplicadas no fim.
+#   python -m benchmark.dataset --tarefas 100000 --usuarios 5000 --saida bench.db
+
+SCHEMA = [
+    """CREATE TABLE "Categoria" (
+        "ID"	INTEGER NOT NULL UNIQUE,
+        "Nome_categoria"	TEXT,
+        PRIMARY KEY("ID" AUTOINCREMENT)
+    )""",
+    """CREATE TABLE "Prioridade" (
+        "ID"	INTEGER NOT NULL UNIQUE,
+        "Nome_prioridade"	TEXT,
+        PRIMARY KEY("ID" AUTOINCREMENT)
+    )""",
+    """CREATE TABLE "Status" (
+        "ID"	INTEGER NOT NULL UNIQUE,
+        "Nome_status"	TEXT,
+        PRIMARY KEY("ID" AUTOINCREMENT)
+    )""",
+    """CREATE TABLE "Usuario" (
+        "ID"	INTEGER NOT NULL UNIQUE,
+        "Nome_usuario"	TEXT,
+        "senha"	TEXT,
+        PRIMARY KEY("ID" AUTOINCREMENT)
+    )""",
+    """CREATE TABLE "categoria_tarefa" (
+        "fk_tarefa"	INTEGER,
+        "fk_categoria"	INTEGER,
+        FOREIGN KEY("fk_categoria") REFERENCES "Categoria"("ID"),
+        FOREIGN KEY("fk_tarefa") REFERENCES "Tarefas"
+    )""",
+    """CREATE TABLE "Tarefas" (
+        "ID"	INTEGER NOT NULL UNIQUE,
+        "Titulo"	TEXT,
+        "Descricao_tarefa"	TEXT,
+        "Data_de_criacao"	TEXT,
+        "Prazo_de_conclusao"	TEXT,
+        "Tempo_estimado"	INTEGER,
+        "fk_prioridade"	INTEGER,
+        "fk_status"	INTEGER,
+        "fk_usuario"	INTEGER,
+        PRIMARY KEY("ID" AUTOINCREMENT),
+        FOREIGN KEY("fk_prioridade") REFERENCES "Prioridade"("ID"),
+        FOREIGN KEY("fk_status") REFERENCES "Status"("ID"),
+        FOREIGN KEY("fk_usuario") REFERENCES "Usuario"("ID")
+    )""",
+]
+
+STATUS = ["a fazer", "fazendo", "feito", "atrasado"]
+PRIORIDADES = ["baixa", "media", "alta"]
+CATEGORIAS = ["Financeiro", "Marketing", "Recursos Humanos", "Juridico", "Comercial", "Tecnologia",
+              "Operações", "Suporte", "Compras", "Logística"]
+VERBOS = ["Implementar", "Revisar", "Corrigir", "Documentar", "Testar", "Migrar", "Atualizar",
+          "Planejar", "Validar", "Publicar", "Analisar", "Configurar"]
+OBJETOS = ["relatório mensal", "rota de login", "campanha de e-mail", "contrato do fornecedor",
+           "painel de vendas", "folha de pagamento", "integração com ERP", "backup do banco",
+           "processo de admissão", "orçamento anual", "página de preços", "fluxo de aprovação"]
+COMPLEMENTOS = ["com a equipe", "antes da reunião", "para o cliente", "conforme checklist",
+                "e registrar pendências", "no ambiente de homologação", "com prioridade", "até sexta"]
+SENHA_PADRAO = "benchmark123"
+INICIO = datetime.date(2024, 1, 1)
+
+
+def gerar_banco(caminho, tarefas=100000, usuarios=5000, categorias=len(CATEGORIAS),
+                categorias_por_tarefa=1.5, seed=42):
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(caminho)
+    try:
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+        conn.executemany("INSERT INTO Status (Nome_status) VALUES (?)", [(s,) for s in STATUS])
+        conn.executemany("INSERT INTO Prioridade (Nome_prioridade) VALUES (?)", [(p,) for p in PRIORIDADES])
+        nomes_categoria = [CATEGORIAS[i % len(CATEGORIAS)] + ("" if i < len(CATEGORIAS) else f" {i}")
+                           for i in range(categorias)]
+        conn.executemany("INSERT INTO Categoria (Nome_categoria) VALUES (?)", [(c,) for c in nomes_categoria])
+
+        # Um único hash (custo de produção) reaproveitado por todos os usuários sintéticos
+        senha = hash_senha(SENHA_PADRAO, int(os.environ.get("SENHA_HASH_ITERACOES", 600000)))
+        conn.executemany("INSERT INTO Usuario (Nome_usuario, senha) VALUES (?, ?)",
+                         ((f"usuario{i}", senha) for i in range(1, usuarios + 1)))
+
+        def tarefa():
+            criacao = INICIO + datetime.timedelta(days=rng.randrange(730))
+            prazo = criacao + datetime.timedelta(days=rng.randrange(1, 60))
+            verbo, objeto = rng.choice(VERBOS), rng.choice(OBJETOS)
+            return (
+                f"{verbo} {objeto}",
+                f"{verbo} {objeto} {rng.choice(COMPLEMENTOS)}; {rng.choice(VERBOS).lower()} {rng.choice(OBJETOS)}",
+                criacao.isoformat(),
+                prazo.isoformat(),
+                rng.randint(1, 40),
+                rng.randint(1, len(PRIORIDADES)),
+                rng.choices(range(1, len(STATUS) + 1), weights=(4, 2, 5, 1))[0],
+                # Distribuição enviesada: poucos usuários concentram muitas tarefas
+                int(usuarios ** rng.random()) if usuarios else None,
+            )
+
+        conn.executemany(
+            "INSERT INTO Tarefas (Titulo, Descricao_tarefa, Data_de_criacao, Prazo_de_conclusao,"
+            " Tempo_estimado, fk_prioridade, fk_status, fk_usuario) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (tarefa() for _ in range(tarefas)),
+        )
+
+        def relacoes():
+            for tarefa_id in range(1, tarefas + 1):
+                quantidade = int(categorias_por_tarefa) + (rng.random() < categorias_por_tarefa % 1)
+                for categoria in rng.sample(range(1, categorias + 1), min(quantidade, categorias)):
+                    yield tarefa_id, categoria
+
+        conn.executemany("INSERT INTO categoria_tarefa (fk_tarefa, fk_categoria) VALUES (?, ?)", relacoes())
+        conn.commit()
+    finally:
+        conn.close()
+    # Índices, FTS, tabelas de versão etc. exatamente como a aplicação faria na subida
+    apply_migrations(caminho)
+    return {
+        "tarefas": tarefas,
+        "usuarios": usuarios,
+        "categorias": categorias,
+        "categorias_por_tarefa": categorias_por_tarefa,
+        "seed": seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco sintético para benchmarks")
+    parser.add_argument("--saida", default="bench.db")
+    parser.add_argument("--tarefas", type=int, default=100000)
+    parser.add_argument("--usuarios", type=int, default=5000)
+    parser.add_argument("--categorias", type=int, default=len(CATEGORIAS))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    info = gerar_banco(args.saida, args.tarefas, args.usuarios, args.categorias, seed=args.seed)
+    print(f"{args.saida}: {info['tarefas']} tarefas, {info['usuarios']} usuários, {info['categorias']} categorias")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark.dataset import OBJETOS, SENHA_PADRAO, VERBOS, gerar_banco
+
+# Benchmark de carga: percorre as rotas do back_end.py sobre um banco sintético e reporta
+# vazão e latência p50/p95/p99 em JSON, para comparar execuções entre commits.
+#   python -m benchmark.load --modo cliente --concorrencia 8 --requisicoes 200 --saida antes.json
+#   python -m benchmark.load --modo servidor --workers 2 --threads 4
+# modo "cliente" usa o test client do Flask no próprio processo (sem rede);
+# modo "servidor" sobe o serve.py em uma porta local e usa HTTP com keep-alive.
+
+BACK_END = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Contexto:
+    """Dados do banco usados para montar as requisições (IDs existentes, usuários etc.)."""
+
+    def __init__(self, caminho, seed):
+        conn = sqlite3.connect(caminho)
+        try:
+            self.max_tarefa = conn.execute("SELECT MAX(ID) FROM Tarefas").fetchone()[0] or 1
+            self.usuarios = conn.execute("SELECT COUNT(*) FROM Usuario").fetchone()[0] or 1
+            self.categorias = conn.execute("SELECT COUNT(*) FROM Categoria").fetchone()[0] or 1
+            # Token de /tarefas/sync para as últimas alterações do banco gerado (instância.sequência)
+            instancia = conn.execute("SELECT valor FROM Configuracao WHERE chave = 'instancia'").fetchone()[0]
+            seq = conn.execute("SELECT versao FROM tabela_versao WHERE tabela = 'Tarefas_seq'").fetchone()[0]
+            self.token_sync = f"{instancia}.{max(0, seq - 200)}"
+        finally:
+            conn.close()
+        self.seed = seed
+        # Contadores compartilhados entre as threads (next() em itertools.count é atômico)
+        self.novos_usuarios = itertools.count(1)
+        self.removidas = itertools.count(0)
+        self.execucao = f"{int(time.time())}"
+
+    def tarefa(self, rng):
+        return rng.randint(1, self.max_tarefa)
+
+    def nova_tarefa(self, rng):
+        return {
+            "Titulo": f"{rng.choice(VERBOS)} {rng.choice(OBJETOS)}",
+            "Descricao_tarefa": f"Criada pelo benchmark: {rng.choice(VERBOS).lower()} {rng.choice(OBJETOS)}",
+            "Data_de_criacao": "2025-01-15",
+            "Prazo_de_conclusao": "2025-02-15",
+            "Tempo_estimado": rng.randint(1, 40),
+            "fk_prioridade": rng.randint(1, 3),
+            "fk_status": rng.randint(1, 4),
+            "fk_usuario": rng.randint(1, self.usuarios),
+        }
+
+
+# (nome, fator sobre --requisicoes, status esperados, função (rng, ctx) -> (método, caminho, corpo))
+# Leituras primeiro; escritas depois; remoções por último.
+CENARIOS = [
+    ("health", 1, (200,), lambda r, c: ("GET", "/health", None)),
+    ("health_pool", 1, (200,), lambda r, c: ("GET", "/health/pool", None)),
+    ("health_cache", 1, (200,), lambda r, c: ("GET", "/health/cache", None)),
+    ("health_admission", 1, (200,), lambda r, c: ("GET", "/health/admission", None)),
+    ("health_clima", 1, (200,), lambda r, c: ("GET", "/health/clima", None)),
+    ("metrics", 0.2, (200,), lambda r, c: ("GET", "/metrics", None)),
+    ("debug_queries", 0.2, (200, 404), lambda r, c: ("GET", "/debug/queries", None)),
+    ("apispec", 0.2, (200,), lambda r, c: ("GET", "/apispec_1.json", None)),
+    ("prioridades", 1, (200,), lambda r, c: ("GET", "/prioridades", None)),
+    ("statuses", 1, (200,), lambda r, c: ("GET", "/statuses", None)),
+    ("categoria", 1, (200,), lambda r, c: ("GET", "/categoria", None)),
+    ("usuarios", 0.5, (200,), lambda r, c: ("GET", "/usuarios", None)),
+    ("tarefas_pagina", 1, (200,),
+     lambda r, c: ("GET", f"/tarefas?limit=100&cursor={c.tarefa(r)}", None)),
+    ("tarefas_todas", 0.02, (200,), lambda r, c: ("GET", "/tarefas", None)),
+    ("tarefas_ndjson", 0.2, (200,), lambda r, c: ("GET", "/tarefas?format=ndjson&limit=500", None)),
+    ("tarefas_por_status", 1, (200,),
+     lambda r, c: ("GET", f"/tarefas/status/{r.randint(1, 4)}?limit=100", None)),
+    ("tarefas_por_usuario", 1, (200,),
+     lambda r, c: ("GET", f"/tarefas/usuario/{r.randint(1, c.usuarios)}", None)),
+    ("tarefa_por_id", 1, (200, 404), lambda r, c: ("GET", f"/tarefas/{c.tarefa(r)}", None)),
+    ("categorias_da_tarefa", 1, (200,), lambda r, c: ("GET", f"/tarefas/{c.tarefa(r)}/categorias", None)),
+    ("tarefas_detalhes", 1, (200,),
+     lambda r, c: ("GET", "/tarefas/detalhes?ids=" + ",".join(str(c.tarefa(r)) for _ in range(50)), None)),
+    ("busca", 1, (200,),
+     lambda r, c: ("GET", f"/tarefas/busca?q={r.choice(VERBOS)}+{r.choice(OBJETOS).split()[0]}", None)),
+    ("board", 0.5, (200,), lambda r, c: ("GET", "/board", None)),
+    ("estatisticas", 1, (200,), lambda r, c: ("GET", "/tarefas/estatisticas", None)),
+    ("eventos", 0.5, (200,), lambda r, c: ("GET", "/tarefas/eventos", None)),
+    ("sync_inicial", 0.5, (200,), lambda r, c: ("GET", "/tarefas/sync?limit=500", None)),
+    ("sync_delta", 1, (200,), lambda r, c: ("GET", f"/tarefas/sync?since={c.token_sync}", None)),
+    ("clima", 1, (200, 500, 503), lambda r, c: ("GET", "/clima", None)),
+    ("login", 0.5, (200,),
+     lambda r, c: ("POST", "/login", {"usuario": f"usuario{r.randint(1, min(10, c.usuarios))}",
+                                      "senha": SENHA_PADRAO})),
+    ("adicionar_usuario", 0.05, (201,),
+     lambda r, c: ("POST", "/adicionarusuario",
+                   {"Nome_usuario": f"bench_{c.execucao}_{next(c.novos_usuarios)}", "senha": SENHA_PADRAO})),
+    ("criar_tarefa", 1, (201,), lambda r, c: ("POST", "/tarefas", c.nova_tarefa(r))),
+    ("criar_tarefas_lote", 0.1, (201,),
+     lambda r, c: ("POST", "/tarefas/batch", [c.nova_tarefa(r) for _ in range(100)])),
+    ("atualizar_status", 1, (200, 404),
+     lambda r, c: ("PUT", f"/tarefas/{c.tarefa(r)}/status", {"status_id": r.randint(1, 4)})),
+    ("atualizar_status_lote", 0.5, (200,),
+     lambda r, c: ("PUT", "/tarefas/status",
+                   [{"tarefa_id": c.tarefa(r), "status_id": r.randint(1, 4)} for _ in range(50)])),
+    ("categoria_tarefa", 1, (201,),
+     lambda r, c: ("POST", "/categoria_tarefa", {"fk_tarefa": c.tarefa(r), "fk_categoria": r.randint(1, c.categorias)})),
+    ("remover_tarefa", 0.5, (200, 404),
+     lambda r, c: ("DELETE", f"/tarefas/{c.max_tarefa - next(c.removidas)}", None)),
+]
+# Depende de rede externa: só roda quando pedido explicitamente
+CENARIOS_EXTERNOS = {"clima"}
+# Streams sem fim (SSE): a medição vai até o primeiro bloco (assinatura feita) e a conexão é fechada
+CENARIOS_STREAM = {"eventos"}
+
+
+class ClienteFlask:
+    def __init__(self, app, headers):
+        self.client = app.test_client()
+        self.headers = headers
+
+    def enviar(self, metodo, caminho, corpo, stream=False):
+        response = self.client.open(caminho, method=metodo, json=corpo, headers=self.headers)
+        if stream and response.status_code == 200:
+            tamanho = len(next(iter(response.response), b""))
+        else:
+            tamanho = len(response.get_data())
+        response.close()
+        return response.status_code, tamanho
+
+    def fechar(self):
+        pass
+
+
+class ClienteHTTP:
+    def __init__(self, host, porta, headers):
+        self.host, self.porta = host, porta
+        self.headers = headers
+        self.conn = None
+
+    def enviar(self, metodo, caminho, corpo, stream=False):
+        headers = dict(self.headers)
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode()
+            headers["Content-Type"] = "application/json"
+        for tentativa in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.porta, timeout=120)
+            try:
+                self.conn.request(metodo, caminho, dados, headers)
+                response = self.conn.getresponse()
+                if stream and response.status == 200:
+                    # Lê até o fim do primeiro bloco SSE; a conexão não pode ser reaproveitada
+                    tamanho = 0
+                    while True:
+                        linha = response.fp.readline()
+                        tamanho += len(linha)
+                        if linha in (b"\n", b"\r\n", b""):
+                            break
+                    self.fechar()
+                    return response.status, tamanho
+                return response.status, len(response.read())
+            except (ConnectionError, http.client.HTTPException):
+                # Conexão keep-alive encerrada pelo servidor (ex. worker reciclado): reconecta uma vez
+                self.fechar()
+                if tentativa:
+                    return 0, 0
+
+    def fechar(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def executar_cenario(nome, fator, esperados, montar, novo_cliente, ctx, requisicoes, concorrencia, aquecimento):
+    total = max(1, int(requisicoes * fator))
+    proxima = itertools.count()
+    latencias = [[] for _ in range(concorrencia)]
+    status = [{} for _ in range(concorrencia)]
+    bytes_recebidos = [0] * concorrencia
+    # Início e fim medidos pelas próprias threads (a thread principal pode demorar a reobter o GIL)
+    janelas = [None] * concorrencia
+    inicio_barreira = threading.Barrier(concorrencia + 1)
+    stream = nome in CENARIOS_STREAM
+
+    def trabalhador(indice):
+        rng = random.Random(f"{ctx.seed}:{nome}:{indice}")
+        cliente = novo_cliente()
+        try:
+            for _ in range(aquecimento if indice == 0 else 0):
+                cliente.enviar(*montar(rng, ctx), stream=stream)
+        except BaseException:
+            inicio_barreira.abort()
+            raise
+        try:
+            inicio_barreira.wait()
+            comeco = time.perf_counter()
+            while next(proxima) < total:
+                metodo, caminho, corpo = montar(rng, ctx)
+                inicio = time.perf_counter()
+                codigo, tamanho = cliente.enviar(metodo, caminho, corpo, stream=stream)
+                latencias[indice].append(time.perf_counter() - inicio)
+                status[indice][codigo] = status[indice].get(codigo, 0) + 1
+                bytes_recebidos[indice] += tamanho
+            janelas[indice] = (comeco, time.perf_counter())
+        finally:
+            cliente.fechar()
+
+    threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    inicio_barreira.wait()
+    for thread in threads:
+        thread.join()
+    concluidas = [j for j in janelas if j is not None]
+    duracao = max(fim for _, fim in concluidas) - min(comeco for comeco, _ in concluidas) if concluidas else 0
+
+    todas = sorted(x for lista in latencias for x in lista)
+    contagem = {}
+    for parcial in status:
+        for codigo, n in parcial.items():
+            contagem[str(codigo)] = contagem.get(str(codigo), 0) + n
+    erros = sum(n for codigo, n in contagem.items() if int(codigo) not in esperados)
+
+    def ms(valor):
+        return round(valor * 1000, 3) if valor is not None else None
+
+    return {
+        "requisicoes": len(todas),
+        "erros": erros,
+        "status": contagem,
+        "duracao_s": round(duracao, 3),
+        "vazao_rps": round(len(todas) / duracao, 1) if duracao else None,
+        "bytes_medio": round(sum(bytes_recebidos) / len(todas)) if todas else 0,
+        "p50_ms": ms(percentil(todas, 50)),
+        "p95_ms": ms(percentil(todas, 95)),
+        "p99_ms": ms(percentil(todas, 99)),
+        "max_ms": ms(todas[-1] if todas else None),
+    }
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor(banco, workers, threads):
+    porta = porta_livre()
+    env = dict(os.environ, DATABASE_PATH=banco, PORT=str(porta), HOST="127.0.0.1",
+               WEB_CONCURRENCY=str(workers), THREADS=str(threads), RATE_LIMIT="0",
+               # Streams abandonados pelo cenário eventos liberam a thread no próximo heartbeat
+               EVENTOS_HEARTBEAT="0.2", EVENTOS_MAX_CONEXOES=str(threads))
+    processo = subprocess.Popen([sys.executable, "serve.py"], cwd=BACK_END, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("serve.py terminou antes de aceitar conexões")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return processo, porta
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("serve.py não respondeu em 60s")
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACK_END, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga das rotas da API")
+    parser.add_argument("--modo", choices=("cliente", "servidor"), default="cliente")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por cenário (antes do fator)")
+    parser.add_argument("--aquecimento", type=int, default=3)
+    parser.add_argument("--banco", default=os.path.join(tempfile.gettempdir(), "kanban_bench.db"),
+                        help="banco sintético; é gerado se não existir e copiado a cada execução")
+    parser.add_argument("--tarefas", type=int, default=100000)
+    parser.add_argument("--usuarios", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--regerar", action="store_true", help="gera o banco mesmo se já existir")
+    parser.add_argument("--cenarios", help="lista separada por vírgula (padrão: todos, exceto externos)")
+    parser.add_argument("--clima", action="store_true", help="inclui /clima (chama a API externa)")
+    parser.add_argument("--gzip", action="store_true", help="envia Accept-Encoding: gzip")
+    parser.add_argument("--workers", type=int, default=2, help="modo servidor: processos do gunicorn")
+    parser.add_argument("--threads", type=int, default=4, help="modo servidor: threads por processo")
+    parser.add_argument("--saida", help="arquivo JSON de resultado (padrão: stdout)")
+    args = parser.parse_args()
+
+    if args.regerar or not os.path.exists(args.banco):
+        print(f"Gerando {args.banco} ...", file=sys.stderr)
+        gerar_banco(args.banco, args.tarefas, args.usuarios, seed=args.seed)
+
+    # Cada execução parte de uma cópia limpa: as rotas de escrita não afetam a próxima
+    diretorio = tempfile.mkdtemp(prefix="kanban_bench_")
+    banco = os.path.join(diretorio, "database.db")
+    shutil.copy(args.banco, banco)
+    ctx = Contexto(banco, args.seed)
+
+    if args.cenarios:
+        nomes = args.cenarios.split(",")
+        cenarios = [c for c in CENARIOS if c[0] in nomes]
+    else:
+        cenarios = [c for c in CENARIOS if c[0] not in CENARIOS_EXTERNOS or args.clima]
+    headers = {"Accept-Encoding": "gzip" if args.gzip else "identity"}
+
+    processo = None
+    try:
+        if args.modo == "servidor":
+            processo, porta = subir_servidor(banco, args.workers, args.threads)
+
+            def novo_cliente():
+                return ClienteHTTP("127.0.0.1", porta, headers)
+        else:
+            os.environ.update(DATABASE_PATH=banco, RATE_LIMIT="0", DB_POOL_SIZE=str(args.concorrencia),
+                              EVENTOS_MAX_CONEXOES=str(args.concorrencia))
+            sys.path.insert(0, BACK_END)
+            from back_end import app, warm_up
+            warm_up()
+
+            def novo_cliente():
+                return ClienteFlask(app, headers)
+
+        resultados = {}
+        for nome, fator, esperados, montar in cenarios:
+            print(f"{nome} ...", file=sys.stderr)
+            resultados[nome] = executar_cenario(nome, fator, esperados, montar, novo_cliente, ctx,
+                                                args.requisicoes, args.concorrencia, args.aquecimento)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait(timeout=30)
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "modo": args.modo,
+        "concorrencia": args.concorrencia,
+        "requisicoes": args.requisicoes,
+        "servidor": {"workers": args.workers, "threads": args.threads} if args.modo == "servidor" else None,
+        "dataset": {"banco": args.banco, "tarefas": ctx.max_tarefa, "usuarios": ctx.usuarios,
+                    "categorias": ctx.categorias},
+        "cenarios": resultados,
+    }
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
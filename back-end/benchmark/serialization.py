@@ -0,0 +1,86 @@
+import argparse
+import json
+import sqlite3
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from serialization import FastJSONProvider, json_array, json_object_sql, orjson
+
+# Compara a serialização da listagem de tarefas:
+#   antes: sqlite3.Row -> dict(row) -> jsonify (json da stdlib)
+#   provider: sqlite3.Row -> dict(row) -> jsonify com FastJSONProvider (orjson, se instalado)
+#   depois: json_object() no SQLite -> trechos JSON unidos em Python (caminho das rotas de listagem)
+COLUNAS = ("ID", "Titulo", "Descricao_tarefa", "Data_de_criacao", "Prazo_de_conclusao",
+           "Tempo_estimado", "fk_prioridade", "fk_status", "fk_usuario")
+
+
+def criar_banco(linhas):
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE Tarefas ({', '.join(COLUNAS)})")
+    conn.executemany(
+        f"INSERT INTO Tarefas VALUES ({', '.join('?' * len(COLUNAS))})",
+        ((i, f"Tarefa {i}", f"Descrição da tarefa {i}: revisar validação e integração", "2025-09-23",
+          "2025-10-01", i % 16, i % 3 + 1, i % 4 + 1, i % 50 + 1) for i in range(1, linhas + 1)),
+    )
+    return conn
+
+
+def consulta():
+    return f"SELECT {', '.join(COLUNAS)} FROM Tarefas ORDER BY ID"
+
+
+def dicts(app, conn):
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(consulta()).fetchall()
+    with app.app_context():
+        return app.json.response([dict(r) for r in rows]).get_data()
+
+
+def json_object(app, conn):
+    conn.row_factory = None
+    cur = conn.execute(f"SELECT ID, {json_object_sql(COLUNAS)} FROM Tarefas ORDER BY ID")
+    with app.app_context():
+        return app.json.compose_response(json_array(tarefa for _, tarefa in cur.fetchall())).get_data()
+
+
+def medir(funcao, repeticoes):
+    melhor, resultado = float("inf"), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark da serialização de listagens")
+    parser.add_argument("--linhas", type=int, default=100000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = criar_banco(args.linhas)
+    original = Flask("original")
+    original.json = DefaultJSONProvider(original)
+    rapido = Flask("rapido")
+    rapido.json = FastJSONProvider(rapido)
+
+    cenarios = [
+        ("dict(row) + json stdlib", lambda: dicts(original, conn)),
+        ("dict(row) + FastJSONProvider" + (" (orjson)" if orjson else ""), lambda: dicts(rapido, conn)),
+        ("json_object no SQLite", lambda: json_object(rapido, conn)),
+    ]
+    referencia, base = None, None
+    for nome, funcao in cenarios:
+        segundos, corpo = medir(funcao, args.repeticoes)
+        if referencia is None:
+            referencia, base = json.loads(corpo), segundos
+        else:
+            # Mesmo conteúdo JSON que o caminho original
+            assert json.loads(corpo) == referencia, nome
+        print(f"{nome:38s} {segundos * 1000:9.1f} ms  {len(corpo) / 1e6:6.1f} MB  x{base / segundos:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"API do clima indisponível, nova tentativa em {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class _Chamada:
+    # Chamada ao upstream em andamento, compartilhada pelas requisições que esperam por ela
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self.done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def set_done(self):
+        with self._lock:
+            self.done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class ClimaClient:
+    """
+    Cliente da API de clima com cache TTL, stale-while-revalidate, coalescência
+    de chamadas concorrentes (single-flight) e circuit breaker.
+    obter() retorna (dados, idade em segundos, estado: HIT, STALE ou MISS).
+    """
+
+    def __init__(self, url, params=None, ttl=600, stale_ttl=3600, timeout=10,
+                 failure_threshold=3, open_seconds=30, session=None):
+        self.url = url
+        self.params = dict(params or {})
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        if session is None:
+            # Sessão com conexões keep-alive reaproveitadas entre chamadas
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session = session
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._inflight = None
+        self._failures = 0
+        self._open_until = 0.0
+        self.counters = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+            "upstream_calls": 0, "upstream_errors": 0, "short_circuits": 0,
+        }
+        # Chamado com a duração (s) de cada chamada ao upstream
+        self.latency_observers = []
+
+    def _observe(self, start):
+        elapsed = time.perf_counter() - start
+        for observer in self.latency_observers:
+            observer(elapsed)
+
+    def _fetch(self):
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.url, params=self.params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        finally:
+            self._observe(start)
+
+    def _start_call(self):
+        # Deve ser chamado com o lock: retorna (chamada, True se esta thread deve executá-la)
+        if self._inflight is not None:
+            self.counters["coalesced"] += 1
+            return self._inflight, False
+        self._inflight = _Chamada()
+        self.counters["upstream_calls"] += 1
+        return self._inflight, True
+
+    def _finish_call(self, call, data=None, error=None):
+        with self._lock:
+            if error is not None:
+                self.counters["upstream_errors"] += 1
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open_until = time.monotonic() + self.open_seconds
+            else:
+                self._value = data
+                self._fetched_at = time.monotonic()
+                self._failures = 0
+                self._open_until = 0.0
+            self._inflight = None
+        call.result = data
+        call.error = error
+        call.set_done()
+
+    def _run_call(self, call):
+        try:
+            data = self._fetch()
+        except Exception as e:
+            self._finish_call(call, error=e)
+        else:
+            self._finish_call(call, data)
+
+    async def _run_call_async(self, call, fetch):
+        start = time.perf_counter()
+        try:
+            data = await fetch()
+        except Exception as e:
+            self._finish_call(call, error=e)
+        else:
+            self._finish_call(call, data)
+        finally:
+            self._observe(start)
+
+    def _circuit_open(self, now):
+        return self._open_until > now
+
+    def _check(self, refresh_in_background):
+        # Decide entre HIT, STALE (com revalidação em segundo plano) e MISS.
+        # Retorna (dados, idade, estado, chamada, lider); chamada é None quando não há espera.
+        now = time.monotonic()
+        with self._lock:
+            age = now - self._fetched_at if self._fetched_at is not None else None
+            if age is not None and age < self.ttl:
+                self.counters["hits"] += 1
+                return self._value, age, "HIT", None, False
+            if age is not None and age < self.stale_ttl:
+                # Serve o último valor bom e revalida em segundo plano
+                self.counters["stale_hits"] += 1
+                if self._inflight is None and not self._circuit_open(now):
+                    call, _ = self._start_call()
+                    refresh_in_background(call)
+                return self._value, age, "STALE", None, False
+            if self._circuit_open(now):
+                self.counters["short_circuits"] += 1
+                raise CircuitOpen(self._open_until - now)
+            self.counters["misses"] += 1
+            call, leader = self._start_call()
+            return None, 0.0, "MISS", call, leader
+
+    def obter(self):
+        def refresh_in_thread(call):
+            threading.Thread(target=self._run_call, args=(call,), daemon=True).start()
+
+        data, age, estado, call, leader = self._check(refresh_in_thread)
+        if call is None:
+            return data, age, estado
+        if leader:
+            self._run_call(call)
+        elif not call.done.wait(self.timeout + 1):
+            raise requests.exceptions.Timeout("Tempo esgotado aguardando a chamada em andamento")
+        if call.error is not None:
+            raise call.error
+        return call.result, 0.0, "MISS"
+
+    async def obter_async(self, fetch):
+        """
+        Versão para o event loop (asgi.py): fetch é uma corrotina que busca os dados
+        com um cliente HTTP assíncrono. Compartilha cache, coalescência e circuit breaker.
+        """
+        loop = asyncio.get_running_loop()
+
+        def refresh_in_task(call):
+            loop.create_task(self._run_call_async(call, fetch))
+
+        data, age, estado, call, leader = self._check(refresh_in_task)
+        if call is None:
+            return data, age, estado
+        if leader:
+            await self._run_call_async(call, fetch)
+        else:
+            done = loop.create_future()
+            call.add_done_callback(lambda: loop.call_soon_threadsafe(
+                lambda: done.done() or done.set_result(None)))
+            await asyncio.wait_for(done, self.timeout + 1)
+        if call.error is not None:
+            raise call.error
+        return call.result, 0.0, "MISS"
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return dict(
+                self.counters,
+                age_s=round(now - self._fetched_at, 3) if self._fetched_at is not None else None,
+                circuit_open=self._circuit_open(now),
+                consecutive_failures=self._failures,
+            )
@@ -0,0 +1,135 @@
+import zlib
+
+from flask import request
+
+# brotli e zstd são opcionais: usados só se os pacotes estiverem instalados
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/x-ndjson", "application/javascript",
+    "text/html", "text/css", "text/plain", "text/javascript",
+}
+# Ordem de preferência do servidor quando o cliente aceita vários com o mesmo peso
+PREFERENCE = ("br", "zstd", "gzip")
+DEFAULT_LEVELS = {"br": 5, "zstd": 3, "gzip": 6}
+
+
+def available_encodings():
+    encodings = {"gzip"}
+    if brotli is not None:
+        encodings.add("br")
+    if zstandard is not None:
+        encodings.add("zstd")
+    return encodings
+
+
+def negotiate(accept_encoding, encodings):
+    # Escolhe a codificação aceita com maior q; empate resolvido por PREFERENCE
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    star = weights.get("*", 0.0)
+    candidates = [(weights.get(e, star), -PREFERENCE.index(e)) for e in PREFERENCE if e in encodings]
+    best = max(candidates, default=None)
+    if best is None or best[0] <= 0:
+        return None
+    return PREFERENCE[-best[1]]
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, level):
+    # Comprime em streaming: cada pedaço é descarregado (flush) para não atrasar o primeiro byte
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        process = compressor.compress
+        flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)  # noqa: E731
+        finish = compressor.flush
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+        finish = compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+class Compressor:
+    """
+    Compressão de respostas negociada por Accept-Encoding (gzip; br e zstd quando instalados).
+    Respostas menores que min_size e endpoints excluídos seguem sem compressão;
+    route_levels permite níveis específicos por endpoint, ex. {"get_tarefas": {"gzip": 4}}.
+    """
+
+    def __init__(self, app=None, min_size=1024, levels=None, route_levels=None, excluded_endpoints=()):
+        self.min_size = min_size
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        self.route_levels = dict(route_levels or {})
+        self.excluded_endpoints = set(excluded_endpoints)
+        self.encodings = available_encodings()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or request.endpoint in self.excluded_endpoints):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), self.encodings)
+        if encoding is None:
+            return response
+        level = self.route_levels.get(request.endpoint, {}).get(encoding, self.levels[encoding])
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(compress(data, encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,101 @@
+import threading
+
+from flask import current_app, request
+
+
+class TableVersions:
+    """
+    Versões de tabela_versao (mantidas por gatilhos) vistas por cada conexão do pool.
+    A tabela só é relida quando PRAGMA data_version (commit de outra conexão) ou
+    total_changes (escrita da própria conexão) mudam desde a última leitura.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}   # id(conexão) -> ((data_version, total_changes), {tabela: versao})
+        self.reads = 0
+
+    def get(self, conn):
+        key = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with self._lock:
+            cached = self._cache.get(id(conn))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        versions = {tabela: versao for tabela, versao in
+                    conn.execute("SELECT tabela, versao FROM tabela_versao").fetchall()}
+        with self._lock:
+            self._cache[id(conn)] = (key, versions)
+            self.reads += 1
+        return versions
+
+
+def _etag_matches(header, etag):
+    # If-None-Match usa comparação fraca: W/"x" e "x" são equivalentes
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGet:
+    """
+    GET condicional por endpoint a partir das versões das tabelas que a resposta lê
+    (route_tables, ex. {"get_tarefas": ("Tarefas",)}), sem calcular hash do corpo.
+    Se o If-None-Match ainda confere, a resposta 304 sai antes de qualquer SELECT da rota.
+    connection() devolve a conexão da requisição; variant() opcional distingue
+    representações da mesma URL (ex. NDJSON negociado pelo Accept).
+    """
+
+    def __init__(self, app=None, connection=None, route_tables=None, instance="", variant=None):
+        self.connection = connection
+        self.route_tables = {endpoint: tuple(tabelas) for endpoint, tabelas in (route_tables or {}).items()}
+        # Identifica o banco: versões de um banco recriado não colidem com ETags antigos
+        self.instance = instance
+        self.variant = variant
+        self.versions = TableVersions()
+        self.not_modified = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def etag(self, tabelas):
+        versions = self.versions.get(self.connection())
+        tag = ".".join(str(versions.get(tabela, 0)) for tabela in tabelas)
+        variant = self.variant() if self.variant is not None else ""
+        return f'W/"{self.instance}-{tag}{"-" + variant if variant else ""}"'
+
+    def before_request(self):
+        tabelas = self.route_tables.get(request.endpoint)
+        if tabelas is None or request.method not in ("GET", "HEAD"):
+            return None
+        etag = request.environ["conditional.etag"] = self.etag(tabelas)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            self.not_modified += 1
+            response = current_app.response_class(status=304)
+            response.headers["ETag"] = etag
+            return response
+        return None
+
+    def after_request(self, response):
+        etag = request.environ.get("conditional.etag")
+        if etag is None or response.status_code not in (200, 304):
+            return response
+        response.headers["ETag"] = etag
+        # O navegador guarda a resposta mas revalida sempre (If-None-Match)
+        response.headers.setdefault("Cache-Control", "no-cache")
+        if self.variant is not None:
+            response.vary.add("Accept")
+        return response
+
+    def stats(self):
+        return {"not_modified": self.not_modified, "version_reads": self.versions.reads}
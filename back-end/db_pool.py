@@ -0,0 +1,211 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# PRAGMAs aplicados uma única vez, quando a conexão é criada
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,        # ~20 MB de cache de páginas por conexão
+    "mmap_size": 268435456,      # 256 MB mapeados em memória
+    "busy_timeout": 5000,        # ms esperando o lock de escrita
+    "temp_store": "MEMORY",
+}
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+def _notify(observers, event, sql, params, start):
+    elapsed = time.perf_counter() - start
+    for observer in observers:
+        observer(event, sql, params, elapsed)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor que mede cada execute e cada fetch e avisa os observadores da conexão com
+    (evento, sql, parâmetros, duração em s), evento "execute" ou "fetch".
+    Sem observadores registrados o custo é só uma verificação de lista vazia.
+    """
+
+    _sql = None
+    _params = None
+
+    def execute(self, sql, params=()):
+        observers = self.connection.observers
+        if not observers:
+            return super().execute(sql, params)
+        self._sql, self._params = sql, params
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            _notify(observers, "execute", sql, params, start)
+
+    def executemany(self, sql, seq_of_params):
+        observers = self.connection.observers
+        if not observers:
+            return super().executemany(sql, seq_of_params)
+        self._sql, self._params = sql, None
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            _notify(observers, "execute", sql, None, start)
+
+    def _timed_fetch(self, fetch, *args):
+        observers = self.connection.observers
+        if not observers or self._sql is None:
+            return fetch(*args)
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            _notify(observers, "fetch", self._sql, self._params, start)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Conexão cujos cursores são TimedCursor; observers é compartilhada com o pool."""
+
+    observers = ()
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # Os atalhos do sqlite3.Connection criam o cursor em C, sem passar por cursor()
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões SQLite já configuradas.
+    As conexões são criadas sob demanda até max_size e reaproveitadas entre requisições.
+    """
+
+    def __init__(self, database, max_size=8, timeout=10.0, pragmas=None):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        # Chamados a cada comando SQL das conexões do pool (ver TimedCursor)
+        self.observers = []
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Chamado também após fork: conexões herdadas do processo pai não são reutilizadas
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+    def connect(self):
+        # Nova conexão configurada; fora da contagem do pool (usada também pelo escritor em writer.py)
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.pragmas.get("busy_timeout", 5000) / 1000,
+            check_same_thread=False,
+            factory=TimedConnection,
+        )
+        conn.observers = self.observers
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._checkouts += 1
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                if self._created < self.max_size:
+                    self._created += 1
+                    create = True
+                else:
+                    self._waits += 1
+                    create = False
+            if conn is not None:
+                self._in_use += 1
+                return conn
+
+        if create:
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        else:
+            # Pool saturado: espera uma conexão ser devolvida
+            start = time.perf_counter()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolExhausted(f"Nenhuma conexão livre após {self.timeout}s")
+            finally:
+                with self._lock:
+                    self._wait_time += time.perf_counter() - start
+
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        if self._pid != os.getpid():
+            return
+        # Nunca devolve ao pool uma conexão com transação pendente
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_s": round(self._wait_time, 6),
+                "timeouts": self._timeouts,
+            }
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
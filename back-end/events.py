@@ -0,0 +1,207 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+def format_sse(events):
+    # Eventos no formato text/event-stream (os dados JSON compactos cabem em uma linha)
+    return "".join(f"id: {event_id}\nevent: {tipo}\ndata: {dados}\n\n" for event_id, tipo, dados in events)
+
+
+class Subscription:
+    """
+    Assinatura de um cliente do feed. Os eventos chegam por uma fila limitada (max_pending):
+    se o cliente não a consome a tempo, a assinatura é encerrada (overflowed) em vez de
+    bloquear quem publica; o cliente reconecta com Last-Event-ID e retoma do histórico.
+    """
+
+    def __init__(self, broadcaster, max_pending, backlog=(), gap=False, start_id=0):
+        self.broadcaster = broadcaster
+        # Último id já publicado no momento da assinatura
+        self.start_id = start_id
+        self.backlog = list(backlog)
+        # Last-Event-ID anterior ao histórico (ou de outro processo/reinício): o cliente deve recarregar
+        self.gap = gap
+        self.overflowed = False
+        # Chamado (na thread de quem publica) a cada evento entregue; usado pelo modo assíncrono
+        self.waker = None
+        self._queue = queue.Queue(max_pending)
+
+    def _push(self, event):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+            self.broadcaster._drop(self)
+        if self.waker is not None:
+            self.waker()
+
+    def get(self, timeout):
+        # Próximo lote de eventos; lista vazia quando o tempo acaba (hora do heartbeat)
+        if self.backlog:
+            events, self.backlog = self.backlog, []
+            return events
+        try:
+            # Encerrada por excesso: só esvazia o que já estava na fila
+            events = [self._queue.get(timeout=0 if self.overflowed else timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class EventBroadcaster:
+    """
+    Distribui eventos de alteração para as assinaturas do processo.
+    Evento = (id, tipo, dados já serializados em JSON); os últimos history eventos ficam
+    em memória para retomar uma conexão a partir do Last-Event-ID.
+    """
+
+    def __init__(self, history=1000, max_pending=256, max_subscribers=100):
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self.last_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, tipo, dados, event_id=None):
+        with self._lock:
+            if event_id is None:
+                event_id = self.last_id + 1
+            elif event_id <= self.last_id:
+                return None
+            self.last_id = event_id
+            event = (event_id, tipo, dados)
+            self._history.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription._push(event)
+        return event_id
+
+    def subscribe(self, last_event_id=None):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers()
+            backlog, gap = self._since(last_event_id)
+            subscription = Subscription(self, self.max_pending, backlog, gap, self.last_id)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _since(self, last_event_id):
+        if last_event_id is None or last_event_id == self.last_id:
+            return [], False
+        if last_event_id > self.last_id or not self._history or self._history[0][0] > last_event_id + 1:
+            return [], True
+        return [e for e in self._history if e[0] > last_event_id], False
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _drop(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.discard(subscription)
+                self.dropped += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "last_id": self.last_id,
+                "history": len(self._history),
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+class SQLiteEventLog:
+    """
+    Fan-out entre processos (workers do gunicorn) pela tabela eventos do próprio banco:
+    append() grava o evento e uma thread por processo lê as linhas novas e as entrega ao
+    EventBroadcaster local, com o id da tabela (o mesmo em todos os processos).
+    A thread só sobe na primeira assinatura e consulta a tabela apenas quando
+    PRAGMA data_version indica commit de outra conexão.
+    """
+
+    def __init__(self, database, broadcaster, interval=0.25, retention=10000):
+        self.database = database
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.errors = 0
+
+    def append(self, conn, tipo, dados):
+        # O commit fica com quem chama (ex. junto com outras escritas do lote)
+        conn.execute("INSERT INTO eventos (tipo, dados) VALUES (?, ?)", (tipo, dados))
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            conn = sqlite3.connect(self.database, check_same_thread=False)
+            # Carrega o fim do log: permite retomar pelo Last-Event-ID logo após um reinício
+            history = self.broadcaster._history.maxlen or 0
+            rows = conn.execute(
+                "SELECT id, tipo, dados FROM (SELECT * FROM eventos ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (history,)).fetchall()
+            for event_id, tipo, dados in rows:
+                self.broadcaster.publish(tipo, dados, event_id)
+            if not rows:
+                ultimo = conn.execute("SELECT MAX(id) FROM eventos").fetchone()[0]
+                self.broadcaster.last_id = max(self.broadcaster.last_id, ultimo or 0)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(conn,), name="eventos-sqlite", daemon=True)
+            self._thread.start()
+
+    def _run(self, conn):
+        data_version = None
+        ciclos = 0
+        while True:
+            time.sleep(self.interval)
+            try:
+                atual = conn.execute("PRAGMA data_version").fetchone()[0]
+                if atual == data_version:
+                    continue
+                data_version = atual
+                self._poll(conn)
+                ciclos += 1
+                if ciclos % 1000 == 0:
+                    self._prune(conn)
+            except sqlite3.Error:
+                self.errors += 1
+
+    def _poll(self, conn):
+        while True:
+            rows = conn.execute("SELECT id, tipo, dados FROM eventos WHERE id > ? ORDER BY id LIMIT 500",
+                                (self.broadcaster.last_id,)).fetchall()
+            for event_id, tipo, dados in rows:
+                self.broadcaster.publish(tipo, dados, event_id)
+            if len(rows) < 500:
+                return
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM eventos WHERE id <= ?", (self.broadcaster.last_id - self.retention,))
+        conn.commit()
@@ -0,0 +1,85 @@
+import threading
+
+# Tabelas de apoio mantidas em memória e a consulta que as carrega
+LOOKUP_QUERIES = {
+    "Status": "SELECT * FROM Status ORDER BY ID",
+    "Prioridade": "SELECT * FROM Prioridade ORDER BY ID",
+    "Categoria": "SELECT * FROM Categoria ORDER BY ID",
+    "Usuario": "SELECT ID, Nome_usuario FROM Usuario ORDER BY ID",
+}
+
+
+class LookupCache:
+    """
+    Cache em processo das tabelas de apoio (Status, Prioridade, Categoria, nomes de Usuario).
+    Uma tabela só é recarregada quando sua versão em tabela_versao muda; essa tabela
+    só é consultada quando PRAGMA data_version indica commit de outra conexão.
+    Escritas feitas pelos nossos endpoints chamam invalidar() diretamente.
+    """
+
+    def __init__(self, queries=None):
+        self.queries = dict(LOOKUP_QUERIES if queries is None else queries)
+        self._lock = threading.Lock()
+        self._rows = {}            # tabela -> lista de dicts
+        self._by_id = {}           # tabela -> {ID: dict}
+        self._versions = {}        # tabela -> versão de tabela_versao usada na carga
+        self._data_versions = {}   # id(conexão) -> último PRAGMA data_version visto
+        self.hits = 0
+        self.misses = 0
+        self.version_checks = 0
+
+    def invalidar(self, *tabelas):
+        with self._lock:
+            for tabela in tabelas or self.queries:
+                self._versions.pop(tabela, None)
+
+    def _sync(self, conn):
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        key = id(conn)
+        if self._data_versions.get(key) == data_version:
+            return
+        self._data_versions[key] = data_version
+        self.version_checks += 1
+        versions = dict(conn.execute("SELECT tabela, versao FROM tabela_versao").fetchall())
+        for tabela, versao in self._versions.items():
+            if versions.get(tabela) != versao:
+                self._versions[tabela] = None
+
+    def _load(self, conn, tabela):
+        # Lê a versão antes dos dados: no pior caso a tabela é recarregada uma vez a mais
+        row = conn.execute("SELECT versao FROM tabela_versao WHERE tabela = ?", (tabela,)).fetchone()
+        rows = [dict(r) for r in conn.execute(self.queries[tabela]).fetchall()]
+        self._rows[tabela] = rows
+        self._by_id[tabela] = {r["ID"]: r for r in rows}
+        self._versions[tabela] = row[0] if row else None
+
+    def _ensure(self, conn, tabela):
+        self._sync(conn)
+        if self._versions.get(tabela) is None or tabela not in self._rows:
+            self.misses += 1
+            self._load(conn, tabela)
+        else:
+            self.hits += 1
+
+    def rows(self, conn, tabela):
+        with self._lock:
+            self._ensure(conn, tabela)
+            return self._rows[tabela]
+
+    def get(self, conn, tabela, id_):
+        with self._lock:
+            self._ensure(conn, tabela)
+            return self._by_id[tabela].get(id_)
+
+    def nome(self, conn, tabela, id_, coluna):
+        row = self.get(conn, tabela, id_) if id_ else None
+        return row[coluna] if row else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "version_checks": self.version_checks,
+                "tabelas": {t: len(r) for t, r in self._rows.items()},
+            }
@@ -0,0 +1,261 @@
+import bisect
+import threading
+import time
+
+from flask import request, request_started
+
+# Limites (s) dos buckets de latência e de comandos SQL por requisição
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    # Cada thread escreve só no próprio shard (sem lock); a exportação soma todos os shards.
+    # O lock é usado apenas quando uma thread registra seu shard pela primeira vez.
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self):
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self):
+        totals = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        shard = self._shard()
+        data = shard.get(labels)
+        if data is None:
+            # Contagem por bucket (+Inf no fim) seguida da soma, alocadas uma vez por série
+            data = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def values(self):
+        totals = {}
+        for shard in self._snapshots():
+            for labels, data in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(data)
+                else:
+                    for i, value in enumerate(data):
+                        total[i] += value
+        return totals
+
+    def render(self):
+        lines = []
+        for labels, data in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data):
+                cumulative += count
+                le = (("le", _number(bound)),)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(data[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Callback:
+    """Métrica lida na hora da exportação: callback() retorna {tupla de labels: valor}."""
+
+    def __init__(self, name, help, callback, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in sorted(self.callback().items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, callback, labelnames=(), kind="gauge"):
+        return self._add(Callback(name, help, callback, labelnames, kind))
+
+    def render(self):
+        # Formato texto do Prometheus (exposition format 0.0.4)
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _CountingIterable:
+    # Conta os bytes enviados (inclusive em streaming) e registra a requisição no close()
+
+    def __init__(self, body, on_close):
+        self.body = body
+        self.on_close = on_close
+        self.sent = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.sent += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.on_close(self.sent)
+
+
+class Metrics:
+    """
+    Instrumentação por endpoint do Flask: histograma de latência, contagem por status,
+    bytes enviados e comandos SQL (quantidade e tempo) por requisição.
+    A medição é feita como middleware WSGI, cobrindo também respostas em streaming e a
+    compressão; observe_statement deve ser registrado em ConnectionPool.observers.
+    """
+
+    def __init__(self, app=None, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.requests = self.registry.counter(
+            "http_requests_total", "Requisições por endpoint e status", ("endpoint", "status"))
+        self.latency = self.registry.histogram(
+            "http_request_duration_seconds", "Duração das requisições (até o último byte)", ("endpoint",))
+        self.bytes_sent = self.registry.counter(
+            "http_response_bytes_total", "Bytes enviados no corpo das respostas", ("endpoint",))
+        self.statements = self.registry.counter(
+            "db_statements_total", "Comandos SQL executados", ("endpoint",))
+        self.statement_time = self.registry.counter(
+            "db_statement_seconds_total", "Tempo gasto em execute e fetch", ("endpoint",))
+        self.statements_per_request = self.registry.histogram(
+            "db_statements_per_request", "Comandos SQL por requisição", ("endpoint",), STATEMENT_BUCKETS)
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # request_started roda antes de qualquer before_request (auth, admissão), já com a rota resolvida
+        request_started.connect(self._mark_endpoint, app, weak=False)
+        app.wsgi_app = self._wrap(app.wsgi_app)
+
+    def _mark_endpoint(self, sender, **extra):
+        request.environ["metrics.endpoint"] = request.endpoint
+
+    def observe_statement(self, event, sql, params, elapsed):
+        current = getattr(self._local, "sql", None)
+        if current is not None:
+            if event == "execute":
+                current[0] += 1
+            current[1] += elapsed
+
+    def capture_context(self):
+        # Contadores SQL da requisição atual, levados às operações do escritor (writer.py)
+        return getattr(self._local, "sql", None)
+
+    def swap_context(self, sql):
+        previous = getattr(self._local, "sql", None)
+        self._local.sql = sql
+        return previous
+
+    def _wrap(self, wsgi_app):
+        def middleware(environ, start_response):
+            start = time.perf_counter()
+            sql = self._local.sql = [0, 0.0]
+            status = ["500"]
+
+            def counting_start_response(status_line, headers, exc_info=None):
+                status[0] = status_line.split(" ", 1)[0]
+                return start_response(status_line, headers, exc_info)
+
+            try:
+                body = wsgi_app(environ, counting_start_response)
+            except Exception:
+                self._record(environ, "500", start, 0, sql)
+                raise
+            return _CountingIterable(body, lambda sent: self._record(environ, status[0], start, sent, sql))
+
+        return middleware
+
+    def _record(self, environ, status, start, sent, sql):
+        self._local.sql = None
+        endpoint = environ.get("metrics.endpoint") or "sem_rota"
+        labels = (endpoint,)
+        self.latency.observe(time.perf_counter() - start, labels)
+        self.requests.inc((endpoint, status))
+        self.bytes_sent.inc(labels, sent)
+        self.statements.inc(labels, sql[0])
+        self.statement_time.inc(labels, sql[1])
+        self.statements_per_request.observe(sql[0], labels)
+
+    def render(self):
+        return self.registry.render()
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+
+import aggregates
+from auth import hash_senhas_legadas
+
+
+class MigracaoInvalida(Exception):
+    pass
+
+
+def _exigir_usuarios_unicos(conn):
+    # O índice único de Nome_usuario falharia com um erro genérico: aponta os duplicados e como resolver
+    duplicados = conn.execute("""
+        SELECT Nome_usuario, group_concat(ID, ', ') FROM (SELECT Nome_usuario, ID FROM Usuario ORDER BY ID)
+        GROUP BY Nome_usuario HAVING COUNT(*) > 1
+    """).fetchall()
+    if not duplicados:
+        return
+    lista = "; ".join(f"{nome!r}: IDs {ids}" for nome, ids in duplicados)
+    raise MigracaoInvalida(
+        f"Usuario tem nomes repetidos ({lista}). Renomeie ou remova os duplicados antes de subir a aplicação, "
+        "ex. mantendo o menor ID de cada nome: UPDATE Usuario SET Nome_usuario = Nome_usuario || '_' || ID "
+        "WHERE ID NOT IN (SELECT MIN(ID) FROM Usuario GROUP BY Nome_usuario)"
+    )
+
+
+def _gatilhos_versao(tabela):
+    # Incrementa tabela_versao a cada INSERT/UPDATE/DELETE na tabela
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela.lower()}_{evento.lower()}
+            AFTER {evento} ON {tabela}
+            BEGIN
+                UPDATE tabela_versao SET versao = versao + 1 WHERE tabela = '{tabela}';
+            END"""
+        for evento in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def _registrar_versao(*tabelas):
+    return [f"INSERT OR IGNORE INTO tabela_versao (tabela, versao) VALUES ('{t}', 0)" for t in tabelas] + [
+        sql for t in tabelas for sql in _gatilhos_versao(t)
+    ]
+
+
+# Migrações versionadas do schema: (versão, descrição, passos).
+# Cada passo é um comando SQL ou uma função que recebe a conexão.
+# A versão aplicada fica gravada em PRAGMA user_version do próprio banco.
+MIGRATIONS = [
+    (1, "Índices secundários de Tarefas, categoria_tarefa e Usuario", [
+        "CREATE INDEX IF NOT EXISTS idx_tarefas_fk_status ON Tarefas(fk_status)",
+        "CREATE INDEX IF NOT EXISTS idx_tarefas_fk_usuario ON Tarefas(fk_usuario)",
+        "CREATE INDEX IF NOT EXISTS idx_categoria_tarefa_tarefa_categoria ON categoria_tarefa(fk_tarefa, fk_categoria)",
+        _exigir_usuarios_unicos,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_usuario_nome_usuario ON Usuario(Nome_usuario)",
+    ]),
+    (2, "Contador de versão por tabela para invalidar o cache das tabelas de apoio", [
+        """CREATE TABLE IF NOT EXISTS tabela_versao (
+               tabela TEXT PRIMARY KEY,
+               versao INTEGER NOT NULL DEFAULT 0
+           )""",
+        *_registrar_versao("Status", "Prioridade", "Categoria", "Usuario"),
+    ]),
+    (3, "Configuracao com o segredo de assinatura dos tokens de sessão", [
+        """CREATE TABLE IF NOT EXISTS Configuracao (
+               chave TEXT PRIMARY KEY,
+               valor TEXT NOT NULL
+           )""",
+        "INSERT OR IGNORE INTO Configuracao (chave, valor) VALUES ('auth_secret', lower(hex(randomblob(32))))",
+    ]),
+    (4, "Índice de texto completo (FTS5) sobre Titulo e Descricao_tarefa", [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS Tarefas_fts USING fts5(
+               Titulo, Descricao_tarefa,
+               content='Tarefas', content_rowid='ID',
+               tokenize='unicode61 remove_diacritics 2'
+           )""",
+        # Gatilhos mantêm o índice em sincronia a cada escrita
+        """CREATE TRIGGER IF NOT EXISTS trg_tarefas_fts_insert AFTER INSERT ON Tarefas
+           BEGIN
+               INSERT INTO Tarefas_fts (rowid, Titulo, Descricao_tarefa)
+               VALUES (NEW.ID, NEW.Titulo, NEW.Descricao_tarefa);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_tarefas_fts_delete AFTER DELETE ON Tarefas
+           BEGIN
+               INSERT INTO Tarefas_fts (Tarefas_fts, rowid, Titulo, Descricao_tarefa)
+               VALUES ('delete', OLD.ID, OLD.Titulo, OLD.Descricao_tarefa);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_tarefas_fts_update AFTER UPDATE OF Titulo, Descricao_tarefa ON Tarefas
+           BEGIN
+               INSERT INTO Tarefas_fts (Tarefas_fts, rowid, Titulo, Descricao_tarefa)
+               VALUES ('delete', OLD.ID, OLD.Titulo, OLD.Descricao_tarefa);
+               INSERT INTO Tarefas_fts (rowid, Titulo, Descricao_tarefa)
+               VALUES (NEW.ID, NEW.Titulo, NEW.Descricao_tarefa);
+           END""",
+        # Indexa as tarefas já existentes
+        "INSERT INTO Tarefas_fts (Tarefas_fts) VALUES ('rebuild')",
+    ]),
+    (5, "Log de eventos de alteração para o feed /tarefas/eventos entre processos", [
+        """CREATE TABLE IF NOT EXISTS eventos (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               tipo TEXT NOT NULL,
+               dados TEXT NOT NULL,
+               criado_em TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+           )""",
+    ]),
+    (6, "Versão de Tarefas e categoria_tarefa (ETags das listagens) e identificador do banco", [
+        *_registrar_versao("Tarefas", "categoria_tarefa"),
+        "INSERT OR IGNORE INTO Configuracao (chave, valor) VALUES ('instancia', lower(hex(randomblob(4))))",
+    ]),
+    (7, "Sequência de alteração de Tarefas e registro de remoções para GET /tarefas/sync", [
+        # Contador global em tabela_versao ('Tarefas_seq'): cada escrita em Tarefas recebe o próximo
+        # valor, gravado em seq_alteracao (linha alterada) ou em Tarefas_removidas (linha removida)
+        "ALTER TABLE Tarefas ADD COLUMN seq_alteracao INTEGER",
+        "UPDATE Tarefas SET seq_alteracao = ID",
+        "INSERT OR IGNORE INTO tabela_versao (tabela, versao) SELECT 'Tarefas_seq', COALESCE(MAX(ID), 0) FROM Tarefas",
+        "CREATE INDEX IF NOT EXISTS idx_tarefas_seq_alteracao ON Tarefas(seq_alteracao)",
+        """CREATE TABLE IF NOT EXISTS Tarefas_removidas (
+               ID INTEGER PRIMARY KEY,
+               seq_alteracao INTEGER NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_tarefas_removidas_seq_alteracao ON Tarefas_removidas(seq_alteracao)",
+        """CREATE TRIGGER IF NOT EXISTS trg_tarefas_seq_insert AFTER INSERT ON Tarefas
+           BEGIN
+               UPDATE tabela_versao SET versao = versao + 1 WHERE tabela = 'Tarefas_seq';
+               UPDATE Tarefas SET seq_alteracao = (SELECT versao FROM tabela_versao WHERE tabela = 'Tarefas_seq')
+               WHERE ID = NEW.ID;
+           END""",
+        # O WHEN ignora o UPDATE feito pelo próprio gatilho (só ele muda seq_alteracao)
+        """CREATE TRIGGER IF NOT EXISTS trg_tarefas_seq_update AFTER UPDATE ON Tarefas
+           WHEN NEW.seq_alteracao IS OLD.seq_alteracao
+           BEGIN
+               UPDATE tabela_versao SET versao = versao + 1 WHERE tabela = 'Tarefas_seq';
+               UPDATE Tarefas SET seq_alteracao = (SELECT versao FROM tabela_versao WHERE tabela = 'Tarefas_seq')
+               WHERE ID = NEW.ID;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_tarefas_seq_delete AFTER DELETE ON Tarefas
+           BEGIN
+               UPDATE tabela_versao SET versao = versao + 1 WHERE tabela = 'Tarefas_seq';
+               INSERT OR REPLACE INTO Tarefas_removidas (ID, seq_alteracao)
+               VALUES (OLD.ID, (SELECT versao FROM tabela_versao WHERE tabela = 'Tarefas_seq'));
+           END""",
+    ]),
+    (8, "Contagens de Tarefas por status, usuário, prioridade e prazo mantidas por gatilhos", [
+        *aggregates.TABELAS,
+        aggregates.reconstruir,
+        *aggregates.gatilhos(),
+    ]),
+    (9, "Hash das senhas legadas em texto puro que ainda não passaram por um login", [
+        lambda conn: hash_senhas_legadas(conn, int(os.environ.get('SENHA_HASH_ITERACOES', 600000))),
+    ]),
+]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(database):
+    """
+    Aplica as migrações pendentes e retorna a versão final do schema.
+    Idempotente: BEGIN IMMEDIATE serializa processos que sobem ao mesmo tempo
+    e a versão é relida dentro da transação.
+    """
+    conn = sqlite3.connect(database, timeout=30, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = current_version(conn)
+            for target, _description, steps in MIGRATIONS:
+                if target <= version:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {int(target)}")
+                version = target
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+    finally:
+        conn.close()
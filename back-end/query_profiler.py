@@ -0,0 +1,194 @@
+import functools
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from flask import request, request_started
+
+# Mesma consulta executada mais vezes que isso numa requisição sugere N+1
+N_PLUS_ONE_THRESHOLD = 10
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+# SCAN de tabela sem índice (exclui subconsultas, tabelas virtuais como o FTS5 e varreduras de índice)
+_FULL_SCAN = re.compile(r"SCAN (?!\(|.*(?:USING|VIRTUAL TABLE|subquery))")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    # Literais viram ?, listas IN (?, ?, ...) viram (?...) e espaços são colapsados
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def param_shape(params):
+    # Tipos dos parâmetros (nunca os valores): "int, str, int x 250"
+    if params is None:
+        return "executemany"
+    values = list(params.values()) if isinstance(params, dict) else list(params)
+    if not values:
+        return ""
+    shape, last, repeat = [], None, 0
+    for name in [type(v).__name__ for v in values] + [None]:
+        if name == last:
+            repeat += 1
+            continue
+        if last is not None:
+            shape.append(last if repeat == 1 else f"{last} x {repeat}")
+        last, repeat = name, 1
+    return ", ".join(shape)
+
+
+class QueryProfiler:
+    """
+    Perfil opcional dos comandos SQL (observador de ConnectionPool.observers).
+    Agrega tempo e contagem por SQL normalizado e por rota; comandos acima de threshold_ms
+    são registrados no log com o formato dos parâmetros e o EXPLAIN QUERY PLAN.
+    """
+
+    def __init__(self, database, threshold_ms=100.0, logger=None, max_slow=200):
+        self.database = database
+        self.threshold = threshold_ms / 1000
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._queries = {}
+        self._plans = {}
+        self._slow = deque(maxlen=max_slow)
+        self.started_at = time.time()
+
+    def init_app(self, app):
+        request_started.connect(self._start_request, app, weak=False)
+
+    def _start_request(self, sender, **extra):
+        self._local.route = request.endpoint or request.path
+        self._local.counts = {}
+        self._local.pending = {}
+
+    def capture_context(self):
+        # Rota e contagens da requisição atual, levadas às operações do escritor (writer.py)
+        return getattr(self._local, "route", None), getattr(self._local, "counts", None)
+
+    def swap_context(self, context):
+        previous = self.capture_context()
+        self._local.route, self._local.counts = context
+        return previous
+
+    def observe(self, event, sql, params, elapsed):
+        route = getattr(self._local, "route", None) or "-"
+        counts = getattr(self._local, "counts", None)
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        normalized = normalize_sql(sql)
+
+        per_request = 0
+        if event == "execute" and counts is not None:
+            per_request = counts[normalized] = counts.get(normalized, 0) + 1
+
+        # Tempo do comando = execute + fetches seguintes; "lento" ao cruzar o limite
+        key = (sql, id(params))
+        if event == "execute":
+            if len(pending) > 256:
+                pending.clear()
+            before = 0.0
+        else:
+            before = pending.get(key, 0.0)
+        total = pending[key] = before + elapsed
+        slow = before < self.threshold <= total
+
+        with self._lock:
+            stats = self._queries.get(normalized)
+            if stats is None:
+                stats = self._queries[normalized] = {
+                    "sql": normalized, "sample": sql, "count": 0, "total_s": 0.0, "max_s": 0.0,
+                    "slow_count": 0, "max_per_request": 0, "routes": {},
+                }
+            if event == "execute":
+                stats["count"] += 1
+                stats["routes"][route] = stats["routes"].get(route, 0) + 1
+                stats["max_per_request"] = max(stats["max_per_request"], per_request)
+            stats["total_s"] += elapsed
+            stats["max_s"] = max(stats["max_s"], total)
+            if slow:
+                stats["slow_count"] += 1
+
+        if slow:
+            self._log_slow(sql, normalized, params, total, route)
+
+    def _log_slow(self, sql, normalized, params, elapsed, route):
+        plan = self.explain(sql, normalized)
+        entry = {
+            "sql": normalized,
+            "duration_ms": round(elapsed * 1000, 3),
+            "params": param_shape(params),
+            "route": route,
+            "plan": plan,
+            "at": time.time(),
+        }
+        with self._lock:
+            self._slow.append(entry)
+        if self.logger is not None:
+            self.logger.warning(
+                "Consulta lenta (%.1f ms) em %s: %s | parâmetros: %s | plano: %s",
+                entry["duration_ms"], route, normalized, entry["params"] or "-", "; ".join(plan) or "-",
+            )
+
+    def explain(self, sql, normalized):
+        # Um EXPLAIN QUERY PLAN por SQL normalizado, em uma conexão somente leitura à parte.
+        # Os parâmetros são ligados como NULL: o plano não depende dos valores e nada sensível é guardado.
+        with self._lock:
+            if normalized in self._plans:
+                return self._plans[normalized]
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+            plan = []
+        else:
+            try:
+                conn = sqlite3.connect(f"file:{self.database}?mode=ro", uri=True)
+                try:
+                    cur = conn.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("?"))
+                    plan = [row[3] for row in cur]
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                plan = [f"erro: {e}"]
+        with self._lock:
+            self._plans[normalized] = plan
+        return plan
+
+    def report(self):
+        with self._lock:
+            queries = [dict(q, routes=dict(q["routes"])) for q in self._queries.values()]
+            slow = list(self._slow)
+        for query in queries:
+            # Comandos que nunca passaram do limite também recebem plano (detecta SCAN sem índice)
+            query["plan"] = self.explain(query.pop("sample"), query["sql"])
+            query["total_ms"] = round(query.pop("total_s") * 1000, 3)
+            query["max_ms"] = round(query.pop("max_s") * 1000, 3)
+            query["avg_ms"] = round(query["total_ms"] / query["count"], 3) if query["count"] else None
+            alerts = []
+            if any(_FULL_SCAN.match(line) for line in query["plan"]):
+                alerts.append("full_scan")
+            if query["max_per_request"] >= N_PLUS_ONE_THRESHOLD:
+                alerts.append("n_plus_one")
+            query["alerts"] = alerts
+        queries.sort(key=lambda q: q["total_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "since": self.started_at,
+            "queries": queries,
+            "slow": slow[::-1],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._plans.clear()
+            self._slow.clear()
+            self.started_at = time.time()
@@ -0,0 +1,94 @@
+from flask.json.provider import DefaultJSONProvider
+
+# orjson é opcional: usado só se o pacote estiver instalado
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RawJSON(str):
+    """Trecho de JSON já serializado, inserido como está por FastJSONProvider.compose()."""
+
+
+def json_object_sql(fields, sort_keys=True):
+    """
+    Expressão json_object(...) do SQLite para os campos informados (nomes de coluna ou pares
+    (chave, expressão)): a linha já sai do banco serializada como objeto JSON, sem sqlite3.Row,
+    dict intermediário ou encoder em Python. Os campos devem vir de listas fixas, nunca do cliente.
+    """
+    pairs = [(f, f) if isinstance(f, str) else tuple(f) for f in fields]
+    if sort_keys:
+        pairs.sort()
+    return "json_object(" + ", ".join(f"'{key}', {expr}" for key, expr in pairs) + ")"
+
+
+def json_array(fragments):
+    # Junta objetos JSON já serializados (ex. de json_object_sql) em um array
+    return RawJSON("[" + ",".join(fragments) + "]")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask que usa orjson quando instalado e a stdlib caso contrário.
+    compose() monta respostas que misturam valores Python e trechos RawJSON vindos do banco.
+    """
+
+    # UTF-8 direto em vez de sequências \uXXXX (como o json_object do SQLite): mais rápido e menor
+    ensure_ascii = False
+
+    def _orjson_option(self, kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _orjson_compatible(self, kwargs):
+        return (orjson is not None and not kwargs.get("ensure_ascii", self.ensure_ascii)
+                and set(kwargs) <= {"default", "sort_keys", "indent", "separators"})
+
+    def dumps(self, obj, **kwargs):
+        if self._orjson_compatible(kwargs):
+            try:
+                return orjson.dumps(obj, default=kwargs.get("default", self.default),
+                                    option=self._orjson_option(kwargs)).decode()
+            except TypeError:
+                # Ex. inteiros maiores que 64 bits: a stdlib serializa
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        # Com orjson o corpo já sai em bytes, sem passar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {"indent": 2} if (self.compact is None and self._app.debug) or self.compact is False else {}
+        if self._orjson_compatible(dump_args):
+            try:
+                body = orjson.dumps(obj, default=self.default, option=self._orjson_option(dump_args))
+                return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+            except TypeError:
+                pass
+        return super().response(*args, **kwargs)
+
+    def compose(self, obj):
+        # Serializa dicts/listas cujos valores podem ser RawJSON (ex. json_array)
+        if isinstance(obj, RawJSON):
+            return obj
+        if isinstance(obj, dict):
+            items = sorted(obj.items()) if self.sort_keys else obj.items()
+            return "{" + ",".join(self.dumps(k) + ":" + self.compose(v) for k, v in items) + "}"
+        if isinstance(obj, (list, tuple)):
+            return "[" + ",".join(self.compose(v) for v in obj) + "]"
+        return self.dumps(obj, separators=(",", ":"))
+
+    def compose_response(self, obj, status=200):
+        return self._app.response_class(f"{self.compose(obj)}\n", status=status, mimetype=self.mimetype)
@@ -0,0 +1,104 @@
+import os
+
+# Servidor de produção: gunicorn com workers pré-fork e threads (gthread).
+# Configuração por variáveis de ambiente:
+#   HOST, PORT, WEB_CONCURRENCY (processos), THREADS (threads por processo),
+#   KEEPALIVE (s), TIMEOUT (s), GRACEFUL_TIMEOUT (s), MAX_REQUESTS, MAX_REQUESTS_JITTER
+# Reinício gracioso: kill -HUP <pid do master> recria os workers sem derrubar conexões.
+# SERVE_MODE=async usa o uvicorn com asgi.py: /clima e o feed /tarefas/eventos rodam no
+# event loop e as rotas do SQLite em um pool de DB_THREADS threads por processo (padrão da
+# imagem Docker). No gthread cada conexão do feed ocupa uma thread: no máximo THREADS/2 por worker.
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 5000))
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+THREADS = int(os.environ.get("THREADS", 4))
+
+
+def post_worker_init(worker):
+    # Executado em cada worker depois do fork: abre as conexões e carrega os caches
+    from back_end import warm_up
+    warm_up()
+
+
+def gunicorn_options():
+    return {
+        "bind": f"{HOST}:{PORT}",
+        "workers": WORKERS,
+        "threads": THREADS,
+        "worker_class": "gthread",
+        "keepalive": int(os.environ.get("KEEPALIVE", 5)),
+        "timeout": int(os.environ.get("TIMEOUT", 30)),
+        "graceful_timeout": int(os.environ.get("GRACEFUL_TIMEOUT", 30)),
+        # Recicla workers periodicamente (com jitter para não reiniciarem juntos)
+        "max_requests": int(os.environ.get("MAX_REQUESTS", 10000)),
+        "max_requests_jitter": int(os.environ.get("MAX_REQUESTS_JITTER", 1000)),
+        # A aplicação é carregada em cada worker: nenhuma conexão SQLite atravessa o fork
+        "preload_app": False,
+        "post_worker_init": post_worker_init,
+        "accesslog": os.environ.get("ACCESS_LOG"),
+        "errorlog": "-",
+    }
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    # Cada thread precisa de uma conexão do pool; definido antes de carregar a aplicação
+    os.environ.setdefault("DB_POOL_SIZE", str(THREADS))
+    # Com mais de um worker o feed /tarefas/eventos precisa do fan-out pelo banco
+    if WORKERS > 1:
+        os.environ.setdefault("EVENTOS_FANOUT", "sqlite")
+
+    class KanbanApplication(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options().items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            from back_end import app
+            return app
+
+    KanbanApplication().run()
+
+
+def run_async():
+    # O tamanho do pool acompanha DB_THREADS (ver asgi.py)
+    import uvicorn
+
+    if WORKERS > 1:
+        os.environ.setdefault("EVENTOS_FANOUT", "sqlite")
+
+    uvicorn.run(
+        "asgi:application",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        lifespan="on",
+        timeout_keep_alive=int(os.environ.get("KEEPALIVE", 5)),
+        limit_max_requests=int(os.environ.get("MAX_REQUESTS", 0)) or None,
+    )
+
+
+def run_threaded():
+    # Alternativa sem gunicorn (ex. Windows): servidor WSGI do Werkzeug com threads, sem debug
+    from werkzeug.serving import run_simple
+
+    os.environ.setdefault("DB_POOL_SIZE", str(THREADS))
+    from back_end import app, warm_up
+
+    warm_up()
+    run_simple(HOST, PORT, app, threaded=True, use_reloader=False, use_debugger=False)
+
+
+if __name__ == "__main__":
+    if os.environ.get("SERVE_MODE") == "async":
+        run_async()
+    else:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            run_threaded()
+        else:
+            run_gunicorn()
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clima_client import CircuitOpen, ClimaClient  # noqa: E402
+
+
+class StubClima:
+    """Servidor HTTP local no lugar da API de clima: conta as chamadas e responde status/atraso configuráveis."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.status = 200
+        self.atraso = 0.0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.chamadas += 1
+                    chamada = stub.chamadas
+                time.sleep(stub.atraso)
+                corpo = json.dumps({"chamada": chamada}).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/forecast"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ClimaClientTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubClima()
+        self.addCleanup(self.stub.close)
+
+    def cliente(self, **kwargs):
+        kwargs.setdefault("timeout", 5)
+        return ClimaClient(self.stub.url, **kwargs)
+
+    def test_ttl_serve_do_cache(self):
+        cliente = self.cliente(ttl=60)
+        dados, _, estado = cliente.obter()
+        self.assertEqual((dados, estado), ({"chamada": 1}, "MISS"))
+        dados, idade, estado = cliente.obter()
+        self.assertEqual((dados, estado), ({"chamada": 1}, "HIT"))
+        self.assertLess(idade, 60)
+        self.assertEqual(self.stub.chamadas, 1)
+
+    def test_chamadas_concorrentes_sao_coalescidas(self):
+        self.stub.atraso = 0.3
+        cliente = self.cliente(ttl=60)
+        resultados = []
+        threads = [threading.Thread(target=lambda: resultados.append(cliente.obter())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.stub.chamadas, 1)
+        self.assertEqual([r[0] for r in resultados], [{"chamada": 1}] * 8)
+        self.assertEqual(cliente.stats()["coalesced"], 7)
+
+    def test_stale_while_revalidate(self):
+        cliente = self.cliente(ttl=0.1, stale_ttl=60)
+        cliente.obter()
+        time.sleep(0.15)
+        # Expirado mas dentro de stale_ttl: responde na hora com o valor antigo e revalida em segundo plano
+        dados, idade, estado = cliente.obter()
+        self.assertEqual((dados, estado), ({"chamada": 1}, "STALE"))
+        self.assertGreaterEqual(idade, 0.1)
+        prazo = time.monotonic() + 5
+        while cliente.stats()["upstream_calls"] < 2 or cliente.stats()["age_s"] > 0.1:
+            self.assertLess(time.monotonic(), prazo, "revalidação não concluída")
+            time.sleep(0.01)
+        dados, _, estado = cliente.obter()
+        self.assertEqual((dados, estado), ({"chamada": 2}, "HIT"))
+        self.assertEqual(self.stub.chamadas, 2)
+
+    def test_circuit_breaker_abre_apos_falhas(self):
+        self.stub.status = 500
+        cliente = self.cliente(failure_threshold=2, open_seconds=30)
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                cliente.obter()
+        with self.assertRaises(CircuitOpen) as erro:
+            cliente.obter()
+        self.assertGreater(erro.exception.retry_after, 29)
+        # Circuito aberto: o upstream não é chamado de novo
+        self.assertEqual(self.stub.chamadas, 2)
+        self.assertTrue(cliente.stats()["circuit_open"])
+
+
+class RotaClimaTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A aplicação sobe sobre uma cópia do banco do repositório (as migrações alteram o arquivo)
+        pasta = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, pasta)
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        shutil.copy(os.path.join(raiz, "database.db"), os.path.join(pasta, "database.db"))
+        os.environ["DATABASE_PATH"] = os.path.join(pasta, "database.db")
+        os.environ.setdefault("SENHA_HASH_ITERACOES", "1000")
+        import back_end
+        cls.back_end = back_end
+
+    def setUp(self):
+        self.stub = StubClima()
+        self.addCleanup(self.stub.close)
+        original = self.back_end.clima_client
+        self.addCleanup(setattr, self.back_end, "clima_client", original)
+        self.client = self.back_end.app.test_client()
+
+    def test_hit_com_cabecalhos_de_cache(self):
+        self.back_end.clima_client = ClimaClient(self.stub.url, ttl=60, timeout=5)
+        self.assertEqual(self.client.get("/clima").headers["X-Cache"], "MISS")
+        resposta = self.client.get("/clima")
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.headers["X-Cache"], "HIT")
+        self.assertIn("Age", resposta.headers)
+        self.assertEqual(self.stub.chamadas, 1)
+
+    def test_circuito_aberto_responde_503_com_retry_after(self):
+        self.stub.status = 500
+        self.back_end.clima_client = ClimaClient(self.stub.url, timeout=5, failure_threshold=1, open_seconds=30)
+        self.assertEqual(self.client.get("/clima").status_code, 500)
+        resposta = self.client.get("/clima")
+        self.assertEqual(resposta.status_code, 503)
+        self.assertGreaterEqual(int(resposta.headers["Retry-After"]), 29)
+        self.assertEqual(self.stub.chamadas, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import queue
+import threading
+import time
+
+
+class WriteTimeout(Exception):
+    pass
+
+
+class _Operation:
+    __slots__ = ("fn", "contexts", "done", "result", "error", "started", "cancelled")
+
+    def __init__(self, fn, contexts):
+        self.fn = fn
+        # Contexto de instrumentação da requisição (rota, contadores) aplicado ao rodar fn
+        self.contexts = contexts
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = False
+        self.cancelled = False
+
+
+class GroupCommitWriter:
+    """
+    Escritor único por processo: as operações (funções que recebem a conexão) entram em uma fila
+    e uma thread dedicada as executa em lotes, cada lote em uma transação com um único commit.
+    Cada operação roda em um SAVEPOINT próprio: se falhar, só ela é desfeita e a exceção volta
+    para quem a enviou. O lote fecha ao atingir max_batch ou max_delay após a primeira operação.
+    contexts: objetos com capture_context()/swap_context(ctx) (ex. Metrics, QueryProfiler) cujo
+    estado por thread é levado da requisição para a thread do escritor durante a operação.
+    """
+
+    def __init__(self, connect, max_batch=64, max_delay=0.001, timeout=10.0, max_queue=1024, contexts=()):
+        self.connect = connect
+        self.contexts = list(contexts)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        # Decide entre cancelamento (timeout de quem enviou) e início da execução
+        self._state_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.operations = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.commit_errors = 0
+        self.largest_batch = 0
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # Após fork a thread do processo pai não existe: fila e thread são recriadas
+            self._queue = queue.Queue(self._queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="escritor-sqlite", daemon=True)
+            self._thread.start()
+
+    def submit(self, fn):
+        # Bloqueia até o commit do lote que contém a operação; devolve o retorno de fn(conn)
+        self._ensure_started()
+        operation = _Operation(fn, [(c, c.capture_context()) for c in self.contexts])
+        try:
+            self._queue.put(operation, timeout=self.timeout)
+        except queue.Full:
+            raise WriteTimeout("Fila de escrita cheia")
+        if not operation.done.wait(self.timeout):
+            with self._state_lock:
+                if not operation.started:
+                    # Ainda na fila: cancelada, nunca será executada (o cliente pode repetir)
+                    operation.cancelled = True
+                    self.cancelled += 1
+                    raise WriteTimeout(f"Escrita não iniciada após {self.timeout}s")
+            # Já está no lote: espera o resultado real (commit ou erro) em vez de falhar
+            operation.done.wait()
+        if operation.error is not None:
+            raise operation.error
+        return operation.result
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = self.connect()
+        # Transações controladas explicitamente (BEGIN/SAVEPOINT/COMMIT)
+        conn.isolation_level = None
+        while True:
+            batch = self._next_batch()
+            try:
+                self._execute(conn, batch)
+            except Exception as e:
+                # Falha fora das operações (BEGIN/COMMIT): o lote inteiro é desfeito
+                self.commit_errors += 1
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                for operation in batch:
+                    if operation.error is None:
+                        operation.error = e
+                        operation.result = None
+            for operation in batch:
+                operation.done.set()
+
+    def _execute(self, conn, batch):
+        conn.execute("BEGIN IMMEDIATE")
+        executed = 0
+        for operation in batch:
+            with self._state_lock:
+                if operation.cancelled:
+                    continue
+                operation.started = True
+            executed += 1
+            previous = [(c, c.swap_context(ctx)) for c, ctx in operation.contexts]
+            conn.execute("SAVEPOINT operacao")
+            try:
+                operation.result = operation.fn(conn)
+            except Exception as e:
+                conn.execute("ROLLBACK TO operacao")
+                operation.error = e
+                self.failed += 1
+            finally:
+                for c, ctx in previous:
+                    c.swap_context(ctx)
+            conn.execute("RELEASE operacao")
+        conn.execute("COMMIT")
+        self.batches += 1
+        self.operations += executed
+        self.largest_batch = max(self.largest_batch, executed)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "operations": self.operations,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "commit_errors": self.commit_errors,
+            "largest_batch": self.largest_batch,
+        }